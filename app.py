@@ -1,7 +1,25 @@
 import os
+import time
+import asyncio
 import logging
-from flask import Flask, request, jsonify, render_template
-from scraper import ShopifyStoreScraper
+from concurrent.futures import Future, ThreadPoolExecutor
+from flask import Flask, Response, g, request, jsonify, render_template
+from scraper import ALL_SECTIONS, ShopifyStoreScraper, parse_fields, store_host
+from async_scraper import AsyncShopifyStoreScraper, BackgroundEventLoop
+from http_cache import HTTPCache, DiskStore, MemoryLRUStore
+from catalog_sync import CatalogSync, FileCatalogStateStore, MemoryCatalogStateStore
+from result_cache import CachedResult, ResultCache, result_cache_key
+from path_memory import PathMemory
+from sitemap import SitemapCache
+from link_keywords import load_link_keywords
+from extraction import ExtractionPool
+from host_limiter import HostLimiter
+from metrics import REGISTRY, Histogram, MetricFamily
+from batch import FairScheduler
+from jobs import INTERNAL_ERROR, JobFailed, JobQueue
+from streaming import (
+    HEARTBEAT_INTERVAL, NDJSON_MIMETYPE, SSE_MIMETYPE, SectionStream, format_ndjson, format_sse
+)
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -11,8 +29,281 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev_secret_key_change_in_production")
 
+# Conditional-request cache shared by both scraping engines
+http_cache_dir = os.environ.get("HTTP_CACHE_DIR")
+http_cache_max_bytes = int(os.environ.get("HTTP_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+http_cache = HTTPCache(
+    DiskStore(http_cache_dir, http_cache_max_bytes) if http_cache_dir
+    else MemoryLRUStore(http_cache_max_bytes)
+)
+
+# Dead candidate paths and the learned path per store and page category
+path_memory = PathMemory(negative_ttl=float(os.environ.get("NEGATIVE_CACHE_TTL", "21600")))
+
+# Sitemap-driven page discovery, cached per store
+sitemap_cache = None
+if os.environ.get("SITEMAP_DISCOVERY", "1") == "1":
+    sitemap_cache = SitemapCache(ttl=float(os.environ.get("SITEMAP_TTL", "21600")))
+
+# trafilatura runs in worker processes when EXTRACT_PROCESSES is set
+extract_processes = int(os.environ.get("EXTRACT_PROCESSES", "0"))
+extraction_pool = None
+if extract_processes > 0:
+    extraction_pool = ExtractionPool(
+        max_workers=extract_processes,
+        timeout=float(os.environ.get("EXTRACT_TIMEOUT", "10")),
+        max_tasks_per_worker=int(os.environ.get("EXTRACT_MAX_TASKS_PER_WORKER", "200"))
+    )
+
+# Per-store rate limit and in-flight cap shared by every scrape of this process
+host_limiter = None
+if os.environ.get("HOST_LIMITER", "1") == "1":
+    host_limiter = HostLimiter(
+        rate=float(os.environ.get("HOST_RATE_LIMIT", "10")),
+        burst=int(os.environ.get("HOST_RATE_BURST", "40")),
+        max_in_flight=int(os.environ.get("HOST_MAX_IN_FLIGHT", "16")),
+        max_retry_after=float(os.environ.get("HOST_MAX_RETRY_AFTER", "30"))
+    )
+
+# Keyword table for the important link categories, from a JSON file
+link_keywords_file = os.environ.get("IMPORTANT_LINK_KEYWORDS")
+
+# Options shared by both scraping engines
+scraper_options = dict(
+    race_paths=os.environ.get("SCRAPER_RACE_PATHS", "1") == "1",
+    max_product_pages=int(os.environ.get("SCRAPER_MAX_PRODUCT_PAGES", "40")),
+    max_products=int(os.environ.get("SCRAPER_MAX_PRODUCTS", "10000")),
+    parser_backend=os.environ.get("HTML_PARSER", "lxml"),
+    http_cache=http_cache,
+    path_memory=path_memory,
+    sitemap_cache=sitemap_cache,
+    link_keywords=load_link_keywords(link_keywords_file) if link_keywords_file else None,
+    extraction_pool=extraction_pool,
+    host_limiter=host_limiter
+)
+
 # Initialize scraper
-scraper = ShopifyStoreScraper()
+scraper = ShopifyStoreScraper(
+    concurrent=os.environ.get("SCRAPER_CONCURRENT", "1") == "1",
+    max_workers=int(os.environ.get("SCRAPER_MAX_WORKERS", "8")),
+    **scraper_options
+)
+
+# Async engine: a single background event loop owns the shared connection pool
+async_scraper = AsyncShopifyStoreScraper(
+    max_connections=int(os.environ.get("SCRAPER_MAX_CONNECTIONS", "200")),
+    **scraper_options
+)
+scraper_loop = BackgroundEventLoop()
+
+# Scrape results are shared between /fetch_insights and its async variant
+result_cache = ResultCache(
+    ttl=float(os.environ.get("RESULT_CACHE_TTL", "300")),
+    max_bytes=int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+)
+
+# Batch scrapes share one pool that takes stores in turn
+batch_max_urls = int(os.environ.get("BATCH_MAX_URLS", "500"))
+batch_scheduler = FairScheduler(
+    max_workers=int(os.environ.get("BATCH_MAX_WORKERS", "16")),
+    max_per_host=int(os.environ.get("BATCH_MAX_PER_HOST", "2"))
+)
+
+# Background scrape jobs for clients that cannot hold a request open
+job_queue = JobQueue(
+    max_workers=int(os.environ.get("JOB_MAX_WORKERS", "4")),
+    max_queued=int(os.environ.get("JOB_MAX_QUEUED", "100")),
+    retention=float(os.environ.get("JOB_RETENTION", "3600")),
+    max_retained_bytes=int(os.environ.get("JOB_RESULTS_MAX_BYTES", str(128 * 1024 * 1024)))
+)
+# Seconds a client is told to wait before resubmitting to a full job queue
+JOB_RETRY_AFTER = 5
+
+# Streamed scrapes run here while the request thread writes their sections
+stream_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("STREAM_MAX_WORKERS", "16")),
+    thread_name_prefix='stream'
+)
+
+# Incremental catalog sync; state survives restarts when a directory is configured
+catalog_state_dir = os.environ.get("CATALOG_STATE_DIR")
+catalog_sync = CatalogSync(
+    scraper,
+    FileCatalogStateStore(catalog_state_dir) if catalog_state_dir else MemoryCatalogStateStore(),
+    full_sync_every=int(os.environ.get("CATALOG_FULL_SYNC_EVERY", "24")),
+    full_sync_interval=float(os.environ.get("CATALOG_FULL_SYNC_INTERVAL", "86400"))
+)
+
+# Request latency of the scraping endpoints, by endpoint, status code and X-Cache.
+# Streamed responses are observed when their first section is sent.
+FETCH_INSIGHTS_SECONDS = Histogram(
+    'infofetch_fetch_insights_duration_seconds', 'Latency of fetch_insights requests',
+    ['endpoint', 'status', 'cache'], buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 60.0)
+)
+TIMED_ENDPOINTS = ('fetch_insights', 'fetch_insights_async', 'fetch_insights_batch', 'fetch_insights_stream')
+
+def _collect_cache_metrics():
+    """Lookups and hit ratios of the result and HTTP caches, read from their stats"""
+    lookups, ratios, sizes = [], [], []
+    # Coalesced requests waited on another request's scrape, so they count as hits
+    for cache, stats, results, hit_keys in (
+        ('result', result_cache.stats(), ('hits', 'misses', 'coalesced'), ('hits', 'coalesced')),
+        ('http', http_cache.stats(), ('hits', 'misses'), ('hits',)),
+    ):
+        total = sum(stats[name] for name in results)
+        hits = sum(stats[name] for name in hit_keys)
+        lookups.extend(('', {'cache': cache, 'result': name}, stats[name]) for name in results)
+        ratios.append(('', {'cache': cache}, hits / total if total else 0.0))
+        sizes.append(('', {'cache': cache}, stats['bytes']))
+    return [
+        MetricFamily('infofetch_cache_lookups_total', 'counter', 'Cache lookups by result', lookups),
+        MetricFamily('infofetch_cache_hit_ratio', 'gauge', 'Share of cache lookups served from the cache', ratios),
+        MetricFamily('infofetch_cache_bytes', 'gauge', 'Bytes held by each cache', sizes),
+    ]
+
+REGISTRY.register_collector(_collect_cache_metrics)
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _observe_latency(response):
+    started = g.get('request_started')
+    if request.endpoint in TIMED_ENDPOINTS and started is not None:
+        FETCH_INSIGHTS_SECONDS.labels(
+            request.endpoint, response.status_code, response.headers.get('X-Cache', 'NONE')
+        ).observe(time.perf_counter() - started)
+    return response
+
+NOT_FOUND_ERROR = {
+    'error': 'Website not found or inaccessible',
+    'message': 'The provided URL could not be accessed or is not a valid Shopify store'
+}
+
+def _check_website_url(data):
+    """
+    Validate a request body and return (website_url, None),
+    or (None, error_body) when the parameter is missing or empty
+    """
+    if not data or 'website_url' not in data:
+        return None, {
+            'error': 'Missing website_url parameter',
+            'message': 'Please provide a valid Shopify store URL'
+        }
+    
+    website_url = data['website_url'].strip()
+    
+    if not website_url:
+        return None, {
+            'error': 'Empty website_url parameter',
+            'message': 'Please provide a valid Shopify store URL'
+        }
+    
+    return website_url, None
+
+def _get_website_url(data):
+    """
+    Validate the request body and return (website_url, None),
+    or (None, error_response) when the parameter is missing or empty
+    """
+    website_url, error = _check_website_url(data)
+    if error:
+        return None, (jsonify(error), 400)
+    return website_url, None
+
+def _requested_max_age():
+    """
+    Maximum acceptable age of a cached result from the Cache-Control
+    request header: no-cache / no-store / max-age=0 force a fresh scrape
+    """
+    cache_control = request.cache_control
+    if cache_control.no_cache or cache_control.no_store:
+        return 0
+    return cache_control.max_age
+
+def _requested_fields(data):
+    """
+    Sections asked for by the fields parameter (body list or comma-separated
+    string, or ?fields=), or (None, error_response) when one is unknown
+    """
+    fields = data.get('fields') if data else None
+    if fields is None:
+        fields = request.args.get('fields')
+    try:
+        return parse_fields(fields), None
+    except ValueError as e:
+        return None, (jsonify({
+            'error': 'Invalid fields parameter',
+            'message': str(e)
+        }), 400)
+
+def _debug_requested(data):
+    """Whether the client asked for per-stage timings (debug flag in body or query)"""
+    if data and data.get('debug') in (True, 1, '1', 'true'):
+        return True
+    return request.args.get('debug') in ('1', 'true')
+
+def _cached_response(cached):
+    response = jsonify(cached.value)
+    response.headers['X-Cache'] = cached.status
+    response.headers['Age'] = str(int(cached.age))
+    return response, 200
+
+def _not_found_response():
+    return jsonify(NOT_FOUND_ERROR), 401
+
+def _internal_error_response():
+    return jsonify(INTERNAL_ERROR), 500
+
+def _scrape_cached(website_url, max_age, on_section=None, sections=ALL_SECTIONS):
+    """Scrape with the sync engine, reusing a recent result for the same store"""
+    return result_cache.get_or_compute(
+        result_cache_key(website_url, sections),
+        lambda: scraper.scrape_store(website_url, on_section=on_section, fields=sections),
+        max_age=max_age
+    )
+
+def _job_work(website_url, max_age):
+    """A job's scrape: fails with the status /fetch_insights would have returned"""
+    def work(on_section):
+        cached = _scrape_cached(website_url, max_age, on_section)
+        if cached.value is None:
+            raise JobFailed(401, NOT_FOUND_ERROR)
+        return cached.value, cached.status
+    return work
+
+def _batch_result(item, max_age):
+    """
+    Scrape one batch entry and return a future of its per-URL result.
+    Entries are URL strings or objects with a website_url field, and fail
+    with the status /fetch_insights would have returned for them.
+    """
+    data = item if isinstance(item, dict) else {'website_url': item}
+    result = {'website_url': data.get('website_url')}
+    if result['website_url'] is not None and not isinstance(result['website_url'], str):
+        website_url, error = None, {
+            'error': 'Invalid website_url parameter',
+            'message': 'Please provide a valid Shopify store URL'
+        }
+    else:
+        website_url, error = _check_website_url(data)
+    if error:
+        future = Future()
+        future.set_result(dict(result, status=400, **error))
+        return future
+    
+    def scrape():
+        try:
+            cached = _scrape_cached(website_url, max_age)
+        except Exception as e:
+            logger.error(f"Internal error while scraping {website_url}: {str(e)}")
+            return dict(result, status=500, **INTERNAL_ERROR)
+        if cached.value is None:
+            return dict(result, status=401, **NOT_FOUND_ERROR)
+        return dict(result, status=200, cache=cached.status, insights=cached.value)
+    
+    return batch_scheduler.submit(store_host(website_url), scrape)
 
 @app.route('/')
 def index():
@@ -26,49 +317,275 @@ def fetch_insights():
     Accepts: website_url parameter
     Returns: JSON with structured store data
     """
+    website_url = None
     try:
         # Get website URL from request
         data = request.get_json()
-        if not data or 'website_url' not in data:
-            return jsonify({
-                'error': 'Missing website_url parameter',
-                'message': 'Please provide a valid Shopify store URL'
-            }), 400
+        website_url, error = _get_website_url(data)
+        if error:
+            return error
+        
+        sections, error = _requested_fields(data)
+        if error:
+            return error
+        
+        logger.info(f"Fetching insights for: {website_url}")
+        
+        if _debug_requested(data):
+            # Timings describe this scrape, so debug requests bypass the result cache
+            cached = CachedResult(scraper.scrape_store(website_url, include_timings=True, fields=sections), 'BYPASS')
+        else:
+            # Scrape store insights, reusing a recent result for the same store
+            cached = _scrape_cached(website_url, _requested_max_age(), sections=sections)
+        
+        if cached.value is None:
+            return _not_found_response()
+        
+        logger.info(f"Successfully scraped insights for: {website_url} ({cached.status})")
+        return _cached_response(cached)
+        
+    except Exception as e:
+        logger.error(f"Internal error while scraping {website_url}: {str(e)}")
+        return _internal_error_response()
+
+@app.route('/fetch_insights/async', methods=['POST'])
+async def fetch_insights_async():
+    """
+    Async variant of /fetch_insights backed by AsyncShopifyStoreScraper.
+    The scrape runs on the shared background event loop, so concurrent
+    requests multiplex over one connection pool instead of blocking on I/O.
+    """
+    website_url = None
+    try:
+        data = request.get_json()
+        website_url, error = _get_website_url(data)
+        if error:
+            return error
+        
+        sections, error = _requested_fields(data)
+        if error:
+            return error
+        
+        logger.info(f"Fetching insights (async) for: {website_url}")
+        
+        if _debug_requested(data):
+            insights = await scraper_loop.run(
+                async_scraper.scrape_store(website_url, include_timings=True, fields=sections)
+            )
+            cached = CachedResult(insights, 'BYPASS')
+        else:
+            # Waiting on a coalesced scrape blocks, so keep it off this loop
+            cached = await asyncio.to_thread(
+                result_cache.get_or_compute,
+                result_cache_key(website_url, sections),
+                lambda: scraper_loop.submit(async_scraper.scrape_store(website_url, fields=sections)).result(),
+                _requested_max_age()
+            )
+        
+        if cached.value is None:
+            return _not_found_response()
+        
+        logger.info(f"Successfully scraped insights for: {website_url} ({cached.status})")
+        return _cached_response(cached)
+        
+    except Exception as e:
+        logger.error(f"Internal error while scraping {website_url}: {str(e)}")
+        return _internal_error_response()
+
+def _stream_body(stream, first, sse):
+    """Encode a scrape's section events as SSE or NDJSON"""
+    encode = format_sse if sse else format_ndjson
+    for event, payload in stream.events(first, HEARTBEAT_INTERVAL if sse else None):
+        if event == 'error':
+            payload.update(NOT_FOUND_ERROR if payload['status'] == 401 else INTERNAL_ERROR)
+        yield encode(event, payload)
+
+@app.route('/fetch_insights/stream', methods=['GET', 'POST'])
+def fetch_insights_stream():
+    """
+    Streaming variant of /fetch_insights
+    Accepts: website_url in the JSON body, or as a query parameter for GET
+    Returns: one event per insights section as soon as its sub-scraper
+    finishes, then a done event; Server-Sent Events when the client accepts
+    text/event-stream, newline-delimited JSON otherwise
+    """
+    website_url = None
+    try:
+        data = request.get_json() if request.method == 'POST' else request.args
+        website_url, error = _get_website_url(data)
+        if error:
+            return error
         
-        website_url = data['website_url'].strip()
+        logger.info(f"Streaming insights for: {website_url}")
         
-        if not website_url:
+        stream = SectionStream()
+        max_age = _requested_max_age()
+        stream_executor.submit(stream.run, lambda on_section: _scrape_cached(website_url, max_age, on_section))
+        
+        # Wait for the homepage, so inaccessible stores still get a plain 401
+        first = stream.first()
+        if first[0] == 'done' and first[1].value is None:
+            return _not_found_response()
+        if first[0] == 'error':
+            return _internal_error_response()
+        
+        sse = request.accept_mimetypes.best_match([NDJSON_MIMETYPE, SSE_MIMETYPE]) == SSE_MIMETYPE
+        response = Response(_stream_body(stream, first, sse), mimetype=SSE_MIMETYPE if sse else NDJSON_MIMETYPE)
+        response.headers['Cache-Control'] = 'no-cache'
+        # Keep reverse proxies from buffering the stream
+        response.headers['X-Accel-Buffering'] = 'no'
+        if first[0] == 'done':
+            response.headers['X-Cache'] = first[1].status
+        return response
+        
+    except Exception as e:
+        logger.error(f"Internal error while streaming {website_url}: {str(e)}")
+        return _internal_error_response()
+
+@app.route('/fetch_insights/batch', methods=['POST'])
+def fetch_insights_batch():
+    """
+    Scrape many stores in one call
+    Accepts: website_urls list (URL strings or {"website_url": ...} objects)
+    Returns: JSON with one result per URL, in request order, each carrying
+    the status /fetch_insights would have returned and its insights or error
+    """
+    try:
+        data = request.get_json()
+        urls = data.get('website_urls') if isinstance(data, dict) else None
+        if not isinstance(urls, list) or not urls:
+            return jsonify({
+                'error': 'Missing website_urls parameter',
+                'message': 'Please provide a list of Shopify store URLs'
+            }), 400
+        if len(urls) > batch_max_urls:
             return jsonify({
-                'error': 'Empty website_url parameter',
-                'message': 'Please provide a valid Shopify store URL'
+                'error': 'Too many website_urls',
+                'message': f'A batch accepts at most {batch_max_urls} store URLs'
             }), 400
         
-        logger.info(f"Fetching insights for: {website_url}")
+        logger.info(f"Fetching insights for a batch of {len(urls)} stores")
         
-        # Scrape store insights
-        insights = scraper.scrape_store(website_url)
+        # Every store is queued up front; the shared pool interleaves hosts
+        max_age = _requested_max_age()
+        futures = [_batch_result(item, max_age) for item in urls]
+        results = [future.result() for future in futures]
         
-        if insights is None:
-            return jsonify({
-                'error': 'Website not found or inaccessible',
-                'message': 'The provided URL could not be accessed or is not a valid Shopify store'
-            }), 401
+        succeeded = sum(1 for result in results if result['status'] == 200)
+        logger.info(f"Batch finished: {succeeded} of {len(results)} stores scraped")
+        return jsonify({
+            'results': results,
+            'summary': {'total': len(results), 'succeeded': succeeded, 'failed': len(results) - succeeded}
+        }), 200
         
-        logger.info(f"Successfully scraped insights for: {website_url}")
-        return jsonify(insights), 200
+    except Exception as e:
+        logger.error(f"Internal error while scraping batch: {str(e)}")
+        return _internal_error_response()
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Start a background scrape and return immediately
+    Accepts: website_url parameter
+    Returns: 202 with the job, its id and a Location to poll; 429 when the queue is full
+    """
+    website_url = None
+    try:
+        data = request.get_json()
+        website_url, error = _get_website_url(data)
+        if error:
+            return error
+        
+        job = job_queue.submit(website_url, _job_work(website_url, _requested_max_age()))
+        if job is None:
+            logger.warning(f"Job queue full, rejecting job for: {website_url}")
+            response = jsonify({
+                'error': 'Too many queued jobs',
+                'message': 'The job queue is full, please retry later'
+            })
+            response.headers['Retry-After'] = str(JOB_RETRY_AFTER)
+            return response, 429
+        
+        logger.info(f"Queued job {job.id} for: {website_url}")
+        response = jsonify(job.as_dict())
+        response.headers['Location'] = f'/jobs/{job.id}'
+        return response, 202
         
     except Exception as e:
-        logger.error(f"Internal error while scraping {website_url}: {str(e)}")
+        logger.error(f"Internal error while queueing job for {website_url}: {str(e)}")
+        return _internal_error_response()
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Poll a job: its status, the sections scraped so far while it runs, and
+    the insights (or the /fetch_insights error) once it has finished
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'error': 'Job not found',
+            'message': 'The job does not exist or its result has expired'
+        }), 404
+    return jsonify(job.as_dict()), 200
+
+@app.route('/sync_products', methods=['POST'])
+def sync_products():
+    """
+    Incremental product catalog sync
+    Accepts: website_url parameter, optional full flag to force a complete walk
+    Returns: JSON with added, changed and removed products since the last sync
+    """
+    website_url = None
+    try:
+        data = request.get_json()
+        website_url, error = _get_website_url(data)
+        if error:
+            return error
+        
+        logger.info(f"Syncing product catalog for: {website_url}")
+        result = catalog_sync.sync(website_url, full=bool(data.get('full', False)))
+        return jsonify(result), 200
+        
+    except Exception as e:
+        logger.error(f"Internal error while syncing {website_url}: {str(e)}")
+        return _internal_error_response()
+
+@app.route('/api/path_map', methods=['GET'])
+def export_path_map():
+    """Export the learned store -> {category: path} map so workers can share it"""
+    return jsonify(path_memory.export_map()), 200
+
+@app.route('/api/path_map', methods=['POST'])
+def import_path_map():
+    """
+    Import a learned path map exported by another worker
+    Accepts: {host: {category: path}}; ?overwrite=0 keeps existing entries
+    """
+    mapping = request.get_json(silent=True)
+    if not isinstance(mapping, dict):
         return jsonify({
-            'error': 'Internal server error',
-            'message': 'An unexpected error occurred while processing your request'
-        }), 500
+            'error': 'Invalid path map',
+            'message': 'Please provide a JSON object mapping hosts to {category: path}'
+        }), 400
+    
+    try:
+        applied = path_memory.import_map(mapping, overwrite=request.args.get('overwrite', '1') == '1',
+                                         normalize_host=store_host)
+    except ValueError as e:
+        return jsonify({'error': 'Invalid path map', 'message': str(e)}), 400
+    return jsonify({'imported': applied}), 200
 
 @app.route('/api/health')
 def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'service': 'Shopify Store Scraper API'}), 200
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of this worker process's metrics"""
+    return Response(REGISTRY.exposition(), mimetype='text/plain; version=0.0.4')
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({
@@ -0,0 +1,497 @@
+import asyncio
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from urllib.parse import urljoin, urlencode
+from typing import (
+    Dict, FrozenSet, Iterable, List, Optional, Any, AsyncIterator, Callable, Awaitable, Tuple, TypeVar, Union
+)
+import aiohttp
+from lxml import etree
+from scraper import (
+    ALL_SECTIONS, DISCOVERY_SECTIONS, PRODUCTS_PAGE_LIMIT, ProductPageError, SectionCallback, ShopifyStoreScraper,
+    normalize_store_url, parse_fields, store_host
+)
+from sitemap import SitemapParser, PageCandidates
+from policies import SHOPIFY_POLICY_PATHS
+from homepage import HomepageIndex
+from scrape_trace import (
+    SCRAPES_IN_FLIGHT, UPSTREAM_RESPONSES, UPSTREAM_TIMEOUTS, ScrapeTrace, record_request, record_winning_path
+)
+from metrics import status_class
+from host_limiter import request_host
+from http_cache import MemoryLRUStore
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+DEFAULT_MAX_CONNECTIONS = 200
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 8
+
+
+class AsyncShopifyStoreScraper(ShopifyStoreScraper):
+    """
+    Async twin of ShopifyStoreScraper built on aiohttp.
+    Network I/O runs on the event loop over one shared connection pool, while
+    HTML parsing and text extraction are pushed to worker threads so a single
+    loop can keep many store scrapes in flight.
+    """
+
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self._client: Optional[aiohttp.ClientSession] = None
+
+    def _get_client(self) -> aiohttp.ClientSession:
+        """Lazily create the HTTP client on the running event loop"""
+        if self._client is None or self._client.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                ttl_dns_cache=300
+            )
+            self._client = aiohttp.ClientSession(
+                connector=connector,
+                headers=dict(self.session.headers),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Close the shared connection pool"""
+        if self._client is not None and not self._client.closed:
+            await self._client.close()
+        self._client = None
+
+    @asynccontextmanager
+    async def _get(self, url: str, **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        GET through the shared client, counting the upstream status and
+        timeouts. With a host limiter the request waits for its host's rate
+        limit and in-flight cap, and is sent once more after a honoured
+        Retry-After.
+        """
+        limiter = self.host_limiter
+        host = request_host(url)
+        for attempt in range(2):
+            if limiter is not None:
+                await limiter.acquire_async(host)
+            try:
+                async with self._get_client().get(url, **kwargs) as response:
+                    UPSTREAM_RESPONSES.labels('async', status_class(response.status)).inc()
+                    retry = limiter is not None and limiter.throttled(
+                        host, response.status, response.headers.get('Retry-After'), 'async')
+                    if retry and not attempt:
+                        continue
+                    yield response
+                    return
+            except asyncio.TimeoutError:
+                UPSTREAM_TIMEOUTS.labels('async').inc()
+                raise
+            finally:
+                if limiter is not None:
+                    limiter.release(host, 'async')
+
+    async def _fetch(self, url: str) -> Tuple[int, bytes]:
+        """Fetch a URL and return its status code and body"""
+        if self.http_cache is None:
+            async with self._get(url) as response:
+                content = await response.read()
+                record_request(len(content))
+                return response.status, content
+
+        entry = await self._run_cache(self.http_cache.lookup, url)
+        headers = self.http_cache.conditional_headers(entry)
+        async with self._get(url, headers=headers) as response:
+            content = await response.read()
+            record_request(len(content), response.status == 304 and entry is not None)
+            status, content, _ = await self._run_cache(
+                self.http_cache.resolve, url, entry, response.status, response.headers, content)
+            return status, content
+
+    async def _run_cache(self, operation: Callable[..., T], *args: Any) -> T:
+        """
+        Run an HTTP cache operation. A disk store reads, writes and evicts
+        files, so its operations run off the event loop shared by all scrapes.
+        """
+        if isinstance(self.http_cache.store, MemoryLRUStore):
+            return operation(*args)
+        return await asyncio.to_thread(operation, *args)
+
+    async def scrape_store(self, website_url: str, include_timings: bool = False,
+                           on_section: Optional[SectionCallback] = None,
+                           fields: Union[None, str, Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Main method to scrape a Shopify store and return structured insights.
+        on_section is called on the event loop as each section is ready.
+        """
+        sections = parse_fields(fields)
+        website_url = normalize_store_url(website_url)
+        trace = ScrapeTrace(website_url, 'async')
+        in_flight = SCRAPES_IN_FLIGHT.labels('async')
+        in_flight.inc()
+        try:
+            insights = await self._scrape_store(website_url, trace, on_section, sections)
+        finally:
+            in_flight.dec()
+            timings = self._report_timings(trace)
+
+        if include_timings and insights is not None:
+            insights['_timings'] = timings
+        return insights
+
+    async def _scrape_store(self, website_url: str, trace: ScrapeTrace,
+                            on_section: Optional[SectionCallback] = None,
+                            sections: FrozenSet[str] = ALL_SECTIONS) -> Optional[Dict[str, Any]]:
+        """Async version of ShopifyStoreScraper._scrape_store"""
+        try:
+            needs_homepage, needs_discovery = self._plan(sections)
+
+            # Sitemap discovery overlaps the homepage fetch
+            pending = []
+            if needs_discovery:
+                pending.append(asyncio.ensure_future(
+                    trace.run_async('sitemap_discovery', self._discover_pages(website_url))
+                ))
+
+            first_products = None
+            try:
+                if needs_homepage:
+                    # Test if website is accessible
+                    status, content = await trace.run_async('homepage', self._fetch(website_url))
+                else:
+                    # Without the homepage, the first catalog page is the accessibility check
+                    first_products = await trace.run_async('products', self._fetch_product_page(website_url, 1))
+            except BaseException:
+                self._cancel_fetches(pending)
+                raise
+            if needs_homepage and status != 200:
+                logger.error(f"Website not accessible: {website_url} (Status: {status})")
+                self._cancel_fetches(pending)
+                return None
+            if not needs_homepage and first_products is None:
+                logger.error(f"Product catalog not accessible: {website_url}")
+                self._cancel_fetches(pending)
+                return None
+
+            page = store_name = None
+            try:
+                if needs_homepage:
+                    # Parse and index the homepage once, off the event loop
+                    page = await trace.run_async('parse_homepage',
+                                                 asyncio.to_thread(self._index_homepage, content))
+
+                    # Check if it's a Shopify store
+                    html_text = content.decode('utf-8', errors='replace')
+                    if not self._is_shopify_store(page, html_text):
+                        logger.warning(f"Website may not be a Shopify store: {website_url}")
+
+                    # Extract store name
+                    store_name = self._extract_store_name(page, website_url)
+
+                # Initialize insights structure with the requested sections only
+                insights = {name: value for name, value in self._new_insights(store_name, website_url).items()
+                            if name in sections}
+                self._report_store(insights, on_section)
+            except BaseException:
+                self._cancel_fetches(pending)
+                raise
+
+            # Scrape different components; coroutines are only created for requested sections
+            stages = [
+                ("products", lambda: self._scrape_products(website_url, first_products)),
+                ("hero_products", lambda: asyncio.to_thread(self._scrape_hero_products, page, website_url)),
+                ("privacy_policy", lambda: self._scrape_privacy_policy(website_url)),
+                ("return_policy", lambda: self._scrape_return_policy(website_url)),
+                ("shipping_policy", lambda: self._scrape_shopify_policy(website_url, 'shipping')),
+                ("terms_of_service", lambda: self._scrape_shopify_policy(website_url, 'terms_of_service')),
+                ("contact_information", lambda: self._scrape_shopify_policy(website_url, 'contact_information')),
+                ("faqs", lambda: self._scrape_faqs(website_url)),
+                ("social_handles", lambda: asyncio.to_thread(self._extract_social_handles, page)),
+                ("contact_details", lambda: self._extract_contact_details(page, website_url)),
+                ("brand_context", lambda: self._scrape_brand_context(website_url)),
+                ("important_links", lambda: asyncio.to_thread(self._extract_important_links, page, website_url)),
+            ]
+            stages = [(name, stage) for name, stage in stages if name in sections]
+
+            async def after_discovery(name: str, stage: Callable[[], Awaitable[Any]]) -> Any:
+                # Discovered pages must be known before the path-probing stages
+                # run; the homepage and catalog sections do not wait for them
+                for discovery in pending:
+                    await discovery
+                return await self._run_stage_async(trace, name, stage(), on_section)
+
+            results = await asyncio.gather(*(
+                after_discovery(name, stage) if name in DISCOVERY_SECTIONS
+                else self._run_stage_async(trace, name, stage(), on_section)
+                for name, stage in stages
+            ))
+            insights.update(zip((name for name, _ in stages), results))
+
+            return insights
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Network error while scraping {website_url}: {str(e)}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error while scraping {website_url}: {str(e)}")
+            raise
+
+    @staticmethod
+    async def _run_stage_async(trace: ScrapeTrace, name: str, stage: Awaitable[Any],
+                               on_section: Optional[SectionCallback]) -> Any:
+        """Run one stage and report its section as soon as it is done"""
+        value = await trace.run_async(name, stage)
+        if on_section is not None:
+            on_section(name, value)
+        return value
+
+    async def _scrape_products(self, website_url: str,
+                               first_page: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Scrape product catalog from all pages of /products.json"""
+        products = []
+
+        try:
+            async for page_products in self._iter_product_pages(website_url, first_page):
+                remaining = self.max_products - len(products)
+                products.extend(self._parse_products(page_products[:remaining], website_url))
+                if len(products) >= self.max_products:
+                    logger.warning(f"Product cap of {self.max_products} reached for {website_url}")
+                    break
+
+        except Exception as e:
+            logger.error(f"Error scraping products: {str(e)}")
+
+        logger.info(f"Found {len(products)} products")
+        return products
+
+    async def _fetch_product_page(self, website_url: str, page: int) -> Optional[List[Dict[str, Any]]]:
+        """Fetch one page of /products.json, or None if the endpoint is unavailable"""
+        params = urlencode({'limit': PRODUCTS_PAGE_LIMIT, 'page': page})
+        status, content = await self._fetch(urljoin(website_url, f'/products.json?{params}'))
+        if status != 200:
+            return None
+        try:
+            return json.loads(content).get('products', [])
+        except ValueError:
+            # Not a Shopify catalog, e.g. an HTML page served for the path
+            return None
+
+    async def _iter_product_pages(self, website_url: str,
+                                  first_page: Optional[List[Dict[str, Any]]] = None
+                                  ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Async version of ShopifyStoreScraper._iter_product_pages"""
+        windows = self._product_page_windows()
+        if first_page is not None:
+            # Page 1 was already fetched by the caller
+            next(windows)
+            if not first_page:
+                return
+            yield first_page
+            if len(first_page) < PRODUCTS_PAGE_LIMIT:
+                return
+
+        for window in windows:
+            fetches = [asyncio.ensure_future(self._fetch_product_page(website_url, page)) for page in window]
+
+            try:
+                for page, fetch in zip(window, fetches):
+                    page_products = await fetch
+                    if page_products is None and page > 1:
+                        raise ProductPageError(f"/products.json page {page} unavailable for {website_url}")
+                    if not page_products:
+                        return
+                    yield page_products
+                    if len(page_products) < PRODUCTS_PAGE_LIMIT:
+                        return
+            finally:
+                self._cancel_fetches(fetches)
+
+        logger.warning(f"Product page cap of {self.max_product_pages} reached for {website_url}")
+
+    async def _scrape_privacy_policy(self, website_url: str) -> str:
+        """Scrape privacy policy content"""
+        return (await self._scrape_shopify_policy(website_url, 'privacy') or
+                await self._scrape_policy_page(website_url, ['privacy', 'privacy-policy'], 'privacy'))
+
+    async def _scrape_return_policy(self, website_url: str) -> str:
+        """Scrape return/refund policy content"""
+        return (await self._scrape_shopify_policy(website_url, 'refund') or
+                await self._scrape_policy_page(website_url, ['return', 'refund', 'returns', 'refunds', 'shipping-returns'], 'refund'))
+
+    async def _scrape_shopify_policy(self, website_url: str, category: str) -> str:
+        """Scrape a policy from its canonical Shopify /policies/* endpoint"""
+        host = store_host(website_url)
+        path = SHOPIFY_POLICY_PATHS[category]
+        if self.path_memory is not None and not self.path_memory.candidate_paths(host, [path]):
+            return ""
+        return await self._probe_round(website_url, host, [path], self._parse_policy_body, category) or ""
+
+    async def _scrape_policy_page(self, website_url: str, possible_paths: List[str], category: str = 'policy') -> str:
+        """Generic method to scrape policy pages"""
+        return await self._probe_paths(website_url, possible_paths, self._parse_text_page, category) or ""
+
+    async def _scrape_faqs(self, website_url: str) -> List[Dict[str, str]]:
+        """Scrape FAQ content"""
+        faq_paths = ['faq', 'faqs', 'help', 'support', 'pages/faq']
+        return await self._probe_paths(website_url, faq_paths, self._parse_faqs, 'faq') or []
+
+    async def _extract_contact_details(self, page: HomepageIndex, website_url: str) -> Dict[str, Any]:
+        """Extract contact information"""
+        contact_details, contact_page_info = await asyncio.gather(
+            asyncio.to_thread(self._extract_homepage_contact_details, page),
+            self._scrape_contact_page(website_url)
+        )
+        if contact_page_info:
+            contact_details.update(contact_page_info)
+
+        return contact_details
+
+    async def _scrape_contact_page(self, website_url: str) -> Dict[str, Any]:
+        """Scrape contact page for additional contact information"""
+        contact_paths = ['contact', 'contact-us', 'pages/contact', 'pages/contact-us']
+        return await self._probe_paths(website_url, contact_paths, self._parse_contact_page, 'contact') or {}
+
+    async def _scrape_brand_context(self, website_url: str) -> str:
+        """Scrape brand context from About page"""
+        about_paths = ['about', 'about-us', 'pages/about', 'pages/about-us', 'our-story', 'pages/our-story']
+        return await self._probe_paths(website_url, about_paths, self._parse_text_page, 'about') or ""
+
+    async def _discover_pages(self, website_url: str) -> Dict[str, List[str]]:
+        """Async version of ShopifyStoreScraper._discover_pages"""
+        if self.sitemap_cache is None:
+            return {}
+
+        host = store_host(website_url)
+        cached = self.sitemap_cache.get(host)
+        if cached is not None:
+            return cached
+
+        candidates = PageCandidates(self.sitemap_cache.max_urls)
+        try:
+            await self._stream_sitemap(urljoin(website_url, '/sitemap.xml'), candidates)
+            for child in candidates.child_sitemaps[:self.sitemap_cache.max_child_sitemaps]:
+                if candidates.exhausted:
+                    break
+                await self._stream_sitemap(child, candidates)
+        except (aiohttp.ClientError, asyncio.TimeoutError, etree.XMLSyntaxError) as e:
+            # Network failures and non-XML sitemaps (HTML error pages served
+            # with 200) are not cached so the next scrape retries
+            logger.debug(f"Sitemap discovery failed for {host}: {str(e)}")
+            return candidates.result()
+
+        discovered = candidates.result()
+        self.sitemap_cache.set(host, discovered)
+        logger.info(f"Discovered {sum(len(p) for p in discovered.values())} candidate pages in sitemap for {host}")
+        return discovered
+
+    async def _stream_sitemap(self, url: str, candidates: PageCandidates) -> None:
+        """Feed one sitemap into candidates chunk by chunk"""
+        parser = SitemapParser()
+        size = 0
+        async with self._get(url) as response:
+            try:
+                if response.status != 200:
+                    return
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    size += len(chunk)
+                    for kind, loc in parser.feed(chunk):
+                        candidates.add(kind, loc)
+                    if candidates.exhausted:
+                        return
+            finally:
+                record_request(size)
+        for kind, loc in parser.close():
+            candidates.add(kind, loc)
+
+    async def _probe_paths(self, website_url: str, paths: List[str],
+                           parse: Callable[[bytes], Any], category: str) -> Any:
+        """Async version of ShopifyStoreScraper._probe_paths"""
+        host = store_host(website_url)
+
+        for round_paths in self._candidate_rounds(host, paths, category):
+            result = await self._probe_round(website_url, host, round_paths, parse, category)
+            if result is not None:
+                return result
+
+        return None
+
+    async def _probe_round(self, website_url: str, host: str, paths: List[str],
+                           parse: Callable[[bytes], Any], category: str) -> Any:
+        """Async version of ShopifyStoreScraper._probe_round; parsing runs off the loop"""
+        urls = [urljoin(website_url, f'/{path}') for path in paths]
+
+        fetches = None
+        if self.race_paths and len(urls) > 1:
+            fetches = [asyncio.ensure_future(self._fetch(url)) for url in urls]
+
+        try:
+            for index, url in enumerate(urls):
+                try:
+                    status, content = await (fetches[index] if fetches else self._fetch(url))
+
+                    result = None
+                    if status == 200:
+                        result = await asyncio.to_thread(parse, content)
+                    self._record_probe(host, category, paths[index], status, result)
+
+                    if result is not None:
+                        logger.info(f"Found {category} content at: {url}")
+                        record_winning_path(paths[index])
+                        return result
+
+                except Exception as e:
+                    # Also an ExtractionError: the page was served but its text
+                    # could not be extracted, so it is not recorded as thin
+                    logger.debug(f"Could not access {category} page at {url}: {str(e)}")
+                    continue
+
+            return None
+        finally:
+            if fetches:
+                self._cancel_fetches(fetches)
+
+    @staticmethod
+    def _cancel_fetches(fetches: List['asyncio.Future']) -> None:
+        """Cancel losing candidate requests and silence their errors"""
+        for fetch in fetches:
+            if not fetch.done():
+                fetch.cancel()
+            elif not fetch.cancelled():
+                fetch.exception()
+
+
+class BackgroundEventLoop:
+    """
+    Long-lived event loop on a daemon thread.
+    Lets synchronous code (e.g. Flask views) hand coroutines to one loop so
+    that every scrape shares the same aiohttp connection pool.
+    """
+
+    def __init__(self, name: str = 'scraper-loop'):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self._started = False
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        if not self._started:
+            with self._lock:
+                if not self._started:
+                    self._thread.start()
+                    self._started = True
+
+    def submit(self, coro: Awaitable[T]) -> 'Future[T]':
+        """Schedule a coroutine on the background loop"""
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def run(self, coro: Awaitable[T]) -> T:
+        """Await a coroutine on the background loop from another event loop"""
+        return await asyncio.wrap_future(self.submit(coro))
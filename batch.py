@@ -0,0 +1,98 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from scraper import POOL_BUSY_WORKERS, POOL_MAX_WORKERS, POOL_QUEUED_TASKS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_WORKERS = 16
+DEFAULT_MAX_PER_HOST = 2
+
+_Task = Tuple[Future, Callable[..., Any], tuple]
+
+
+class FairScheduler:
+    """
+    Runs tasks on a shared thread pool, taking hosts in round-robin order and
+    capping the tasks in flight per host, so a batch of many URLs for one
+    store cannot starve the other stores of the same or later batches.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_BATCH_WORKERS,
+                 max_per_host: int = DEFAULT_MAX_PER_HOST, name: str = 'batch'):
+        self.max_workers = max(1, max_workers)
+        self.max_per_host = max(1, max_per_host)
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        # Queued tasks per host, and the hosts with queued tasks in turn order
+        self._queues: Dict[str, Deque[_Task]] = {}
+        self._hosts: Deque[str] = deque()
+        self._active: Dict[str, int] = {}
+        self._running = 0
+        self._lock = threading.Lock()
+        self._queued_gauge = POOL_QUEUED_TASKS.labels(name)
+        self._busy_gauge = POOL_BUSY_WORKERS.labels(name)
+        POOL_MAX_WORKERS.labels(name).set(self.max_workers)
+
+    def submit(self, host: str, fn: Callable[..., Any], *args) -> Future:
+        """Queue fn(*args) behind the other tasks of the same host"""
+        future: Future = Future()
+        with self._lock:
+            queue = self._queues.get(host)
+            if queue is None:
+                queue = self._queues[host] = deque()
+                self._hosts.append(host)
+            queue.append((future, fn, args))
+        self._queued_gauge.inc()
+        self._dispatch()
+        return future
+
+    def _dispatch(self) -> None:
+        """Hand queued tasks to free workers while hosts have spare capacity"""
+        with self._lock:
+            while self._running < self.max_workers:
+                task = self._next_task()
+                if task is None:
+                    break
+                self._running += 1
+                self._executor.submit(self._run, *task)
+
+    def _next_task(self) -> Optional[Tuple[str, Future, Callable[..., Any], tuple]]:
+        """Pop the next task of the first host in turn that is under its cap"""
+        for _ in range(len(self._hosts)):
+            host = self._hosts.popleft()
+            queue = self._queues[host]
+            if self._active.get(host, 0) >= self.max_per_host:
+                self._hosts.append(host)
+                continue
+            future, fn, args = queue.popleft()
+            if queue:
+                self._hosts.append(host)
+            else:
+                del self._queues[host]
+            self._active[host] = self._active.get(host, 0) + 1
+            return host, future, fn, args
+        return None
+
+    def _run(self, host: str, future: Future, fn: Callable[..., Any], args: tuple) -> None:
+        self._queued_gauge.dec()
+        self._busy_gauge.inc()
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            self._busy_gauge.dec()
+            with self._lock:
+                self._running -= 1
+                self._active[host] -= 1
+                if not self._active[host]:
+                    del self._active[host]
+            self._dispatch()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
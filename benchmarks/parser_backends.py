@@ -0,0 +1,128 @@
+"""
+Parse-time benchmark and parity check for the HTML parser backends.
+
+Runs the homepage extractors (and the FAQ parser on FAQ pages) over saved
+pages with every backend, reports the median time per page and fails when
+a backend extracts different insights than html.parser.
+
+    python benchmarks/parser_backends.py saved/homepage1.html saved/homepage2.html
+    python benchmarks/parser_backends.py --faq saved/faq.html saved/homepage.html
+
+Without arguments a generated Shopify-theme homepage is used.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_parsers import PARSER_BACKENDS  # noqa: E402
+from scraper import ShopifyStoreScraper  # noqa: E402
+
+REFERENCE_BACKEND = 'html.parser'
+WEBSITE_URL = 'https://example-store.myshopify.com'
+
+
+def homepage_insights(scraper: ShopifyStoreScraper, content: bytes) -> Dict[str, Any]:
+    """Everything scrape_store extracts from the homepage itself"""
+    page = scraper._index_homepage(content)
+    contact = scraper._extract_homepage_contact_details(page)
+    return {
+        'is_shopify': scraper._is_shopify_store(page, content.decode('utf-8', errors='replace')),
+        'store_name': scraper._extract_store_name(page, WEBSITE_URL),
+        'hero_products': scraper._scrape_hero_products(page, WEBSITE_URL),
+        'social_handles': scraper._extract_social_handles(page),
+        # Set-derived lists have no stable order
+        'contact_details': {key: sorted(value) if isinstance(value, list) else value
+                            for key, value in contact.items()},
+        'important_links': scraper._extract_important_links(page, WEBSITE_URL),
+    }
+
+
+def faq_insights(scraper: ShopifyStoreScraper, content: bytes) -> Dict[str, Any]:
+    return {'faqs': scraper._parse_faqs(content)}
+
+
+def sample_homepage() -> bytes:
+    """A homepage shaped like a typical Shopify theme"""
+    menu = ''.join(f'<li><a href="/collections/c{i}">Collection {i}</a></li>' for i in range(60))
+    cards = ''.join(
+        f'<div class="card-wrapper"><a href="/products/item-{i}" class="card">'
+        f'<img src="//cdn.shopify.com/s/files/item-{i}.jpg" alt="Item {i}">'
+        f'<span class="card__heading">Item {i}</span><span class="price-item">Rs. {i}99</span></a>'
+        f'<p>Soft, durable and made to last. Free shipping on orders over Rs. 999.</p></div>'
+        for i in range(120)
+    )
+    footer = (
+        '<a href="/pages/track-order">Track your order</a><a href="/blogs/news">Journal</a>'
+        '<a href="/pages/shipping-policy">Shipping</a><a href="/pages/size-chart">Size chart</a>'
+        '<a href="https://instagram.com/examplestore">Instagram</a>'
+        '<a href="https://facebook.com/examplestore">Facebook</a>'
+        '<p>Write to support@example-store.com or call +91 98765 43210</p>'
+        '<p>Office address: 12 Example Road, Bengaluru, Karnataka 560001</p>'
+    )
+    scripts = ''.join(f'<script>window.ShopifyAnalytics = {{"chunk": {i}}};</script>' for i in range(40))
+    return (
+        '<!doctype html><html><head><meta charset="utf-8"><title>Example Store</title>'
+        '<meta property="og:site_name" content="Example Store">'
+        '<link rel="stylesheet" href="//cdn.shopify.com/theme.css">'
+        f'{scripts}</head><body><header class="shopify-section"><nav><ul>{menu}</ul></nav></header>'
+        f'<main>{cards}</main><footer class="shopify-section">{footer}</footer></body></html>'
+    ).encode()
+
+
+def run(pages: List[Dict[str, Any]], repeat: int) -> bool:
+    scrapers = {backend: ShopifyStoreScraper(parser_backend=backend) for backend in PARSER_BACKENDS}
+    parity = True
+
+    print(f"{'page':<40} {'backend':<12} {'median ms':>10} {'speedup':>8}  parity")
+    for page in pages:
+        extract = faq_insights if page['faq'] else homepage_insights
+        reference = extract(scrapers[REFERENCE_BACKEND], page['content'])
+        reference_time = None
+
+        for backend in PARSER_BACKENDS:
+            scraper = scrapers[backend]
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = extract(scraper, page['content'])
+                timings.append(time.perf_counter() - start)
+            median = statistics.median(timings)
+            if reference_time is None:
+                reference_time = median
+
+            mismatched = [key for key in reference if result.get(key) != reference[key]]
+            parity = parity and not mismatched
+            status = 'ok' if not mismatched else 'DIFF ' + ', '.join(mismatched)
+            print(f"{page['name'][:40]:<40} {backend:<12} {median * 1000:>10.2f} "
+                  f"{reference_time / median:>7.2f}x  {status}")
+
+    return parity
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('homepages', nargs='*', help='saved homepage HTML files')
+    parser.add_argument('--faq', action='append', default=[], help='saved FAQ page HTML file')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per page and backend')
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.homepages:
+        with open(path, 'rb') as f:
+            pages.append({'name': os.path.basename(path), 'content': f.read(), 'faq': False})
+    for path in args.faq:
+        with open(path, 'rb') as f:
+            pages.append({'name': os.path.basename(path), 'content': f.read(), 'faq': True})
+    if not pages:
+        pages.append({'name': '(generated homepage)', 'content': sample_homepage(), 'faq': False})
+
+    return 0 if run(pages, max(1, args.repeat)) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Record a live store into a replayable benchmark fixture.
+
+Runs scrape_store with path racing, with and without sitemap discovery,
+so every candidate path is requested, and saves each response the scraper
+received (404s included), gzip-compressed, under benchmarks/fixtures/<name>/.
+
+    python benchmarks/record_store.py https://example-store.com sample-store
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay import ORIGIN_PLACEHOLDER  # noqa: E402
+from scraper import ShopifyStoreScraper, normalize_store_url  # noqa: E402
+from sitemap import SitemapCache  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+EXTENSIONS = {'application/json': '.json', 'application/xml': '.xml', 'text/xml': '.xml'}
+
+
+def record(website_url: str, directory: str) -> int:
+    website_url = normalize_store_url(website_url)
+    origin = '{0.scheme}://{0.netloc}'.format(urlsplit(website_url))
+    netloc = urlsplit(website_url).netloc
+    responses = {}
+
+    def keep(response, *args, **kwargs):
+        # Reading the body here still lets streamed callers iterate over it
+        response.content
+        parts = urlsplit(response.url)
+        path = parts.path + ('?' + parts.query if parts.query else '')
+        if parts.netloc == netloc and not response.is_redirect and path not in responses:
+            responses[path] = response
+
+    # With and without sitemap discovery, so the guessed paths (and the
+    # store's real 404 pages) are recorded too
+    for sitemap_cache in (SitemapCache(), None):
+        scraper = ShopifyStoreScraper(race_paths=True, sitemap_cache=sitemap_cache)
+        scraper.session.hooks['response'].append(keep)
+        if scraper.scrape_store(website_url) is None:
+            print(f"Scrape of {website_url} failed; recording what was received", file=sys.stderr)
+
+    os.makedirs(os.path.join(directory, 'bodies'), exist_ok=True)
+    entries = []
+    for i, (path, response) in enumerate(sorted(responses.items())):
+        content_type = response.headers.get('Content-Type', 'text/html')
+        extension = EXTENSIONS.get(content_type.split(';')[0].strip(), '.html')
+        body_name = f'bodies/{i:04d}{extension}.gz'
+        # Absolute and protocol-relative links to the store both replay locally
+        body = response.content.replace(origin.encode(), ORIGIN_PLACEHOLDER.encode())
+        body = body.replace(b'//' + netloc.encode(), ORIGIN_PLACEHOLDER.encode())
+        # mtime=0 keeps re-recorded fixtures byte-identical when nothing changed
+        with open(os.path.join(directory, body_name), 'wb') as f:
+            f.write(gzip.compress(body, mtime=0))
+        entries.append({'path': path, 'status': response.status_code,
+                        'content_type': content_type, 'body': body_name})
+
+    manifest = {
+        'store': os.path.basename(os.path.normpath(directory)),
+        'recorded_from': origin,
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'responses': entries,
+    }
+    with open(os.path.join(directory, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return len(entries)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('url', help='store URL to record')
+    parser.add_argument('name', help='fixture name (directory under benchmarks/fixtures)')
+    args = parser.parse_args()
+
+    count = record(args.url, os.path.join(FIXTURES_DIR, args.name))
+    print(f"Recorded {count} responses into {os.path.join(FIXTURES_DIR, args.name)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
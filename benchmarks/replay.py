@@ -0,0 +1,142 @@
+"""
+Recorded store fixtures and the local HTTP server that replays them.
+
+A fixture is a directory with a manifest.json listing every recorded
+response and a bodies/ directory holding the gzip-compressed bodies:
+
+    {
+      "store": "sample-apparel",
+      "recorded_from": "https://sample-apparel.example",
+      "responses": [
+        {"path": "/", "status": 200, "content_type": "text/html; charset=utf-8", "body": "bodies/0000.html.gz"},
+        {"path": "/products.json?limit=250&page=1", "status": 200, ...}
+      ]
+    }
+
+The recorded origin is stored as ORIGIN_PLACEHOLDER inside bodies and
+replaced with the replay server's own origin, so sitemap and absolute links
+point back at the stand-in server. Paths that were never recorded get 404.
+"""
+import gzip
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+ORIGIN_PLACEHOLDER = '__STORE_ORIGIN__'
+NOT_FOUND_BODY = b'<html><body><h1>404 Page Not Found</h1></body></html>'
+
+
+def request_key(path: str) -> str:
+    """Path plus sorted query string, so parameter order does not matter"""
+    parts = urlsplit(path)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return parts.path + ('?' + query if query else '')
+
+
+class Fixture:
+    """The recorded responses of one store"""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            manifest = json.load(f)
+        self.name = manifest.get('store') or os.path.basename(os.path.normpath(directory))
+        self.responses: Dict[str, Tuple[int, str, bytes]] = {}
+        for entry in manifest['responses']:
+            body = b''
+            if entry.get('body'):
+                path = os.path.join(directory, entry['body'])
+                with (gzip.open if path.endswith('.gz') else open)(path, 'rb') as f:
+                    body = f.read()
+            self.responses[request_key(entry['path'])] = (
+                entry['status'], entry.get('content_type', 'text/html'), body
+            )
+
+
+def load_fixtures(root: str) -> Dict[str, Fixture]:
+    """Every fixture directory under root, by store name"""
+    fixtures = {}
+    for name in sorted(os.listdir(root)):
+        directory = os.path.join(root, name)
+        if os.path.isfile(os.path.join(directory, 'manifest.json')):
+            fixture = Fixture(directory)
+            fixtures[fixture.name] = fixture
+    return fixtures
+
+
+class ReplayServer:
+    """
+    Serves one fixture on an ephemeral localhost port. Counts requests and
+    body bytes sent, and can add a fixed latency per response to stand in
+    for network round trips.
+    """
+
+    def __init__(self, fixture: Fixture, latency: float = 0.0):
+        self.fixture = fixture
+        self.latency = latency
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self.origin = f'http://127.0.0.1:{self._server.server_address[1]}'
+        self._bodies: Dict[str, bytes] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately; without this, delayed
+            # ACKs add ~40ms to every response
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                status, content_type, body = server.lookup(self.path)
+                if server.latency:
+                    time.sleep(server.latency)
+                server.count(len(body))
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def lookup(self, path: str) -> Tuple[int, str, bytes]:
+        key = request_key(path)
+        entry = self.fixture.responses.get(key)
+        if entry is None:
+            return 404, 'text/html; charset=utf-8', NOT_FOUND_BODY
+        status, content_type, body = entry
+        # Point recorded absolute URLs at this server, once per body
+        rewritten = self._bodies.get(key)
+        if rewritten is None:
+            rewritten = self._bodies[key] = body.replace(ORIGIN_PLACEHOLDER.encode(), self.origin.encode())
+        return status, content_type, rewritten
+
+    def count(self, size: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += size
+
+    def snapshot(self) -> Tuple[int, int]:
+        with self._lock:
+            return self.requests, self.bytes_sent
+
+    def __enter__(self) -> 'ReplayServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,260 @@
+"""
+Offline benchmark suite for the scraper.
+
+Replays recorded store fixtures (benchmarks/fixtures/*) through a local
+stand-in server and measures scrape_store end to end and every
+_scrape_*/_extract_* stage on its own: latency percentiles, requests and
+bytes per call, and the peak RSS of the whole run. Results are written as
+JSON so two commits can be compared:
+
+    python benchmarks/scrape_suite.py --output before.json
+    python benchmarks/scrape_suite.py --output after.json --compare before.json
+
+Every measured call uses a fresh scraper, so no cache carries over between
+iterations.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay import Fixture, ReplayServer, load_fixtures  # noqa: E402
+from html_parsers import DEFAULT_PARSER_BACKEND, PARSER_BACKENDS  # noqa: E402
+from host_limiter import (  # noqa: E402
+    DEFAULT_HOST_BURST, DEFAULT_HOST_MAX_IN_FLIGHT, DEFAULT_HOST_RATE, HostLimiter
+)
+from scraper import ShopifyStoreScraper  # noqa: E402
+from sitemap import SitemapCache  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Stage name -> call; every homepage extractor gets the indexed homepage
+STAGES: Dict[str, Callable[[ShopifyStoreScraper, str, Any], Any]] = {
+    '_index_homepage': lambda scraper, url, page: scraper._index_homepage(page),
+    '_scrape_products': lambda scraper, url, page: scraper._scrape_products(url),
+    '_scrape_hero_products': lambda scraper, url, page: scraper._scrape_hero_products(page, url),
+    '_scrape_privacy_policy': lambda scraper, url, page: scraper._scrape_privacy_policy(url),
+    '_scrape_return_policy': lambda scraper, url, page: scraper._scrape_return_policy(url),
+    '_scrape_shopify_policy[shipping]': lambda scraper, url, page: scraper._scrape_shopify_policy(url, 'shipping'),
+    '_scrape_shopify_policy[terms_of_service]':
+        lambda scraper, url, page: scraper._scrape_shopify_policy(url, 'terms_of_service'),
+    '_scrape_shopify_policy[contact_information]':
+        lambda scraper, url, page: scraper._scrape_shopify_policy(url, 'contact_information'),
+    '_scrape_faqs': lambda scraper, url, page: scraper._scrape_faqs(url),
+    '_extract_social_handles': lambda scraper, url, page: scraper._extract_social_handles(page),
+    '_extract_contact_details': lambda scraper, url, page: scraper._extract_contact_details(page, url),
+    '_scrape_brand_context': lambda scraper, url, page: scraper._scrape_brand_context(url),
+    '_extract_important_links': lambda scraper, url, page: scraper._extract_important_links(page, url),
+}
+
+# Stages that take the raw homepage bytes rather than the index
+RAW_HOMEPAGE_STAGES = ('_index_homepage',)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of values"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: List[float], requests: List[int], sizes: List[int]) -> Dict[str, Any]:
+    return {
+        'iterations': len(latencies),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p90': round(percentile(latencies, 90) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+            'max': round(max(latencies) * 1000, 3),
+            'mean': round(sum(latencies) / len(latencies) * 1000, 3),
+        },
+        'requests': round(sum(requests) / len(requests), 2),
+        'bytes': round(sum(sizes) / len(sizes)),
+    }
+
+
+def peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def release(scraper: ShopifyStoreScraper) -> None:
+    """Stop a scraper's worker pools and connections between iterations"""
+    for executor in (scraper._executor, scraper._probe_executor):
+        if executor is not None:
+            executor.shutdown(wait=True)
+    scraper.session.close()
+
+
+class Suite:
+    def __init__(self, options: Dict[str, Any], iterations: int, latency: float):
+        self.options = options
+        self.iterations = iterations
+        self.latency = latency
+
+    def new_scraper(self) -> ShopifyStoreScraper:
+        sitemap_cache = SitemapCache() if self.options['sitemap'] else None
+        # A fresh limiter per scraper measures a cold scrape of an idle host
+        host_limiter = None
+        if self.options['host_limiter']:
+            host_limiter = HostLimiter(
+                rate=self.options['host_rate'],
+                burst=self.options['host_burst'],
+                max_in_flight=self.options['host_max_in_flight']
+            )
+        return ShopifyStoreScraper(
+            concurrent=self.options['concurrent'],
+            race_paths=self.options['race_paths'],
+            parser_backend=self.options['parser_backend'],
+            sitemap_cache=sitemap_cache,
+            host_limiter=host_limiter
+        )
+
+    def measure(self, server: ReplayServer, call: Callable[[ShopifyStoreScraper], Any],
+                prepare: Optional[Callable[[ShopifyStoreScraper], Any]] = None) -> Dict[str, Any]:
+        latencies, requests, sizes = [], [], []
+        for _ in range(self.iterations):
+            scraper = self.new_scraper()
+            if prepare is not None:
+                prepare(scraper)
+            before_requests, before_bytes = server.snapshot()
+            start = time.perf_counter()
+            call(scraper)
+            latencies.append(time.perf_counter() - start)
+            after_requests, after_bytes = server.snapshot()
+            requests.append(after_requests - before_requests)
+            sizes.append(after_bytes - before_bytes)
+            release(scraper)
+        return summarize(latencies, requests, sizes)
+
+    def run_store(self, fixture: Fixture) -> Dict[str, Any]:
+        with ReplayServer(fixture, self.latency) as server:
+            url = server.origin
+            homepage = server.lookup('/')[2]
+            indexed = self.new_scraper()._index_homepage(homepage)
+            # Probing stages see the pages discovery would have found
+            discover = (lambda scraper: scraper._discover_pages(url)) if self.options['sitemap'] else None
+
+            result = {'scrape_store': self.measure(server, lambda scraper: scraper.scrape_store(url))}
+            stages = {}
+            for name, stage in STAGES.items():
+                page = homepage if name in RAW_HOMEPAGE_STAGES else indexed
+                stages[name] = self.measure(server, lambda scraper: stage(scraper, url, page), discover)
+            result['stages'] = stages
+        return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    """Human-readable table on stderr; with a baseline, p50 and request deltas"""
+    out = sys.stderr
+    header = f"{'store':<22} {'call':<44} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'reqs':>6} {'KB':>8}"
+    if baseline:
+        header += f" {'p50 vs base':>12} {'reqs vs base':>13}"
+    print(header, file=out)
+    for store, store_result in results['stores'].items():
+        calls = {'scrape_store': store_result['scrape_store'], **store_result['stages']}
+        base_store = (baseline or {}).get('stores', {}).get(store, {})
+        base_calls = {'scrape_store': base_store.get('scrape_store'), **base_store.get('stages', {})}
+        for name, stats in calls.items():
+            latency = stats['latency_ms']
+            line = (f"{store[:22]:<22} {name[:44]:<44} {latency['p50']:>9.2f} {latency['p90']:>9.2f} "
+                    f"{latency['p99']:>9.2f} {stats['requests']:>6g} {stats['bytes'] / 1024:>8.1f}")
+            base = base_calls.get(name)
+            if baseline and base:
+                ratio = latency['p50'] / base['latency_ms']['p50'] if base['latency_ms']['p50'] else 0.0
+                line += f" {ratio:>11.2f}x {stats['requests'] - base['requests']:>+13g}"
+            print(line, file=out)
+    # ru_maxrss is a high-water mark for the whole run, not any one store
+    print(f"{'all stores':<22} {'peak RSS':<44} {results['peak_rss_kb'] / 1024:>9.1f} MB", file=out)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='directory of recorded store fixtures')
+    parser.add_argument('--store', action='append', help='only run this fixture (repeatable)')
+    parser.add_argument('--iterations', type=int, default=5, help='measured calls per scrape and stage')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='added latency per replayed response')
+    parser.add_argument('--concurrent', action='store_true', help='run sub-scrapers on the worker pool')
+    parser.add_argument('--race-paths', action='store_true', help='request candidate paths concurrently')
+    parser.add_argument('--sitemap', action='store_true', help='enable sitemap page discovery')
+    parser.add_argument('--parser', default=DEFAULT_PARSER_BACKEND, choices=PARSER_BACKENDS)
+    parser.add_argument('--host-limiter', action='store_true', help='send requests through a per-host limiter')
+    parser.add_argument('--host-rate', type=float, default=DEFAULT_HOST_RATE, help='limiter requests per second')
+    parser.add_argument('--host-burst', type=int, default=DEFAULT_HOST_BURST, help='limiter burst')
+    parser.add_argument('--host-max-in-flight', type=int, default=DEFAULT_HOST_MAX_IN_FLIGHT,
+                        help='limiter requests in flight per host')
+    parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    parser.add_argument('--compare', help='baseline JSON results to compare against')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    fixtures = load_fixtures(args.fixtures)
+    if args.store:
+        fixtures = {name: fixture for name, fixture in fixtures.items() if name in args.store}
+    if not fixtures:
+        print(f"No fixtures found in {args.fixtures}", file=sys.stderr)
+        return 1
+
+    options = {
+        'concurrent': args.concurrent,
+        'race_paths': args.race_paths,
+        'sitemap': args.sitemap,
+        'parser_backend': args.parser,
+        'host_limiter': args.host_limiter,
+        'host_rate': args.host_rate,
+        'host_burst': args.host_burst,
+        'host_max_in_flight': args.host_max_in_flight,
+        'iterations': max(1, args.iterations),
+        'latency_ms': args.latency_ms,
+    }
+    suite = Suite(options, options['iterations'], args.latency_ms / 1000.0)
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'options': options,
+        },
+        'stores': {},
+    }
+    for name, fixture in fixtures.items():
+        results['stores'][name] = suite.run_store(fixture)
+    results['peak_rss_kb'] = peak_rss_kb()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Microbenchmark and parity check for the social handle matcher.
+
+Compares social.extract_social_handles with the previous per-pattern
+re.search loop on generated homepages with thousands of anchors, reports
+the median time of each and fails when they disagree.
+
+    python benchmarks/social_handles.py
+    python benchmarks/social_handles.py --anchors 1000 5000 20000 --repeat 20
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from social import extract_social_handles  # noqa: E402
+
+LEGACY_PATTERNS = {
+    'instagram': [r'instagram\.com/([^/\s"\']+)', r'@([a-zA-Z0-9_.]+)'],
+    'facebook': [r'facebook\.com/([^/\s"\']+)'],
+    'twitter': [r'twitter\.com/([^/\s"\']+)', r'x\.com/([^/\s"\']+)'],
+    'tiktok': [r'tiktok\.com/@([^/\s"\']+)'],
+    'youtube': [r'youtube\.com/([^/\s"\']+)'],
+    'linkedin': [r'linkedin\.com/([^/\s"\']+)']
+}
+
+# Links a footer typically carries, plus look-alikes the patterns also match
+SOCIAL_LINKS = [
+    'https://www.Instagram.com/examplestore/',
+    'https://facebook.com/examplestore',
+    'https://www.tiktok.com/@examplestore',
+    'https://x.com/examplestore',
+    'https://www.youtube.com/@examplestore',
+    'mailto:support@example-store.com',
+    'https://www.dropbox.com/s/lookbook.pdf',
+]
+
+
+def legacy_social_handles(hrefs: List[str], text: str) -> Dict[str, Dict[str, str]]:
+    """The matcher this replaced: every pattern over every href, then the text"""
+    social_handles = {}
+    for platform, patterns in LEGACY_PATTERNS.items():
+        for pattern in patterns:
+            for href in hrefs:
+                match = re.search(pattern, href, re.IGNORECASE)
+                if match:
+                    social_handles[platform] = {'handle': match.group(1), 'url': href}
+                    break
+            if platform not in social_handles:
+                match = re.search(pattern, text, re.IGNORECASE)
+                if match:
+                    social_handles[platform] = {'handle': match.group(1), 'url': f"https://{platform}.com/{match.group(1)}"}
+    return social_handles
+
+
+def generated_homepage(anchors: int, rng: random.Random) -> Tuple[List[str], str]:
+    """hrefs and text of a large catalogue homepage with its social links in the footer"""
+    hrefs = []
+    for i in range(anchors):
+        kind = i % 4
+        if kind == 0:
+            hrefs.append(f'/products/item-{i}?variant={rng.randint(10 ** 6, 10 ** 7)}')
+        elif kind == 1:
+            hrefs.append(f'/collections/collection-{i % 97}')
+        elif kind == 2:
+            hrefs.append(f'https://example-store.com/products/item-{i}#reviews')
+        else:
+            hrefs.append(f'//cdn.shopify.com/s/files/1/0{i}/files/item-{i}.jpg')
+    hrefs.extend(SOCIAL_LINKS)
+    text = ' '.join(
+        f'Item {i} Soft, durable and made to last. Rs. {i}99 Add to cart'
+        for i in range(anchors // 2)
+    ) + ' Follow us on Twitter @examplestore or linkedin.com/company/example-store'
+    return hrefs, text
+
+
+def random_case(rng: random.Random) -> Tuple[List[str], str]:
+    """Short random hrefs and text dense in prefixes, for the parity check"""
+    pieces = ['instagram.com/', 'INSTAGRAM.COM/', '@', 'facebook.com/', 'twitter.com/', 'x.com/',
+              'tiktok.com/@', 'youtube.com/', 'linkedin.com/', 'ſ', 'ı', 'İ', 'K', '/', ' ', '\n',
+              '"', "'", 'ab', 'Z9', '_.', 'com', 'x', 'tik']
+
+    def value() -> str:
+        return ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 8)))
+
+    return [value() for _ in range(rng.randint(0, 6))], value()
+
+
+def median_ms(fn: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--anchors', type=int, nargs='+', default=[1000, 5000, 20000],
+                        help='anchors per generated homepage')
+    parser.add_argument('--repeat', type=int, default=10, help='timed runs per homepage and matcher')
+    parser.add_argument('--cases', type=int, default=20000, help='random cases for the parity check')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    mismatches = 0
+    for _ in range(args.cases):
+        hrefs, text = random_case(rng)
+        if extract_social_handles(hrefs, text) != legacy_social_handles(hrefs, text):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"DIFF hrefs={hrefs!r} text={text!r}")
+    print(f"parity: {args.cases - mismatches}/{args.cases} random cases match")
+
+    print(f"{'anchors':>8} {'legacy ms':>10} {'merged ms':>10} {'speedup':>8}  parity")
+    for anchors in args.anchors:
+        hrefs, text = generated_homepage(anchors, rng)
+        same = extract_social_handles(hrefs, text) == legacy_social_handles(hrefs, text)
+        mismatches += not same
+        legacy = median_ms(lambda: legacy_social_handles(hrefs, text), max(1, args.repeat))
+        merged = median_ms(lambda: extract_social_handles(hrefs, text), max(1, args.repeat))
+        print(f"{anchors:>8} {legacy:>10.2f} {merged:>10.2f} {legacy / merged:>7.1f}x  {'ok' if same else 'DIFF'}")
+
+    return 0 if not mismatches else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,257 @@
+import json
+import os
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any
+from scraper import ShopifyStoreScraper, PRODUCTS_PAGE_LIMIT, ProductPageError, normalize_store_url, store_host
+
+logger = logging.getLogger(__name__)
+
+# Incremental syncs run between complete walks, at most this many or this old
+DEFAULT_FULL_SYNC_EVERY = 24
+DEFAULT_FULL_SYNC_INTERVAL = 24 * 3600
+
+
+class MemoryCatalogStateStore:
+    """In-process catalog state, keyed by store host"""
+
+    def __init__(self):
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._states.get(key)
+
+    def set(self, key: str, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self._states[key] = state
+
+
+class FileCatalogStateStore:
+    """Catalog state persisted as one JSON file per store host"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        safe_key = ''.join(c if c.isalnum() or c in '.-' else '_' for c in key)
+        return os.path.join(self.directory, f'{safe_key}.json')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable catalog state for {key}: {str(e)}")
+            return None
+
+    def set(self, key: str, state: Dict[str, Any]) -> None:
+        path = self._path(key)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse a Shopify updated_at timestamp into an aware datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class CatalogSync:
+    """
+    Incremental /products.json sync keyed on updated_at.
+
+    The state kept per store is the newest updated_at seen, a map of
+    product id -> updated_at, and whether the catalog is known to be listed
+    newest-first by updated_at. For such stores every product changed since
+    the last run appears before the first known, unchanged product older
+    than that watermark, so the walk stops there. Other stores are walked
+    in full.
+
+    A listing that merely happens to be in updated_at order, such as one
+    sorted by created_at with no product edited yet, proves nothing. The
+    ordering is only trusted after a complete walk in updated_at order that
+    is out of created_at order, i.e. an edited product has moved ahead of
+    newer ones. It is dropped as soon as a walk sees products out of order.
+
+    Removed products can only be detected by a complete walk, so they are
+    reported when the catalog was exhausted. Besides the first sync,
+    full=True and stores without usable ordering, a complete walk is forced
+    every full_sync_every syncs or full_sync_interval seconds, which also
+    checks the ordering again. A walk cut short by a failed page is
+    incomplete: it reports what it saw, removes nothing and keeps the old
+    watermark, so changes past the failed page are found by the next sync.
+    """
+
+    def __init__(self, scraper: ShopifyStoreScraper, store=None,
+                 full_sync_every: int = DEFAULT_FULL_SYNC_EVERY,
+                 full_sync_interval: float = DEFAULT_FULL_SYNC_INTERVAL):
+        self.scraper = scraper
+        self.store = store if store is not None else MemoryCatalogStateStore()
+        self.full_sync_every = max(1, full_sync_every)
+        self.full_sync_interval = full_sync_interval
+
+    def _needs_full_walk(self, previous: Optional[Dict[str, Any]]) -> bool:
+        """Whether a complete walk is due to reconcile removals and recheck the ordering"""
+        if not previous:
+            return True
+        # States written before complete walks were tracked get one now
+        last_complete = _parse_timestamp(previous.get('last_complete_at'))
+        if last_complete is None:
+            return True
+        if previous.get('syncs_since_complete', 0) >= self.full_sync_every:
+            return True
+        return (datetime.now(timezone.utc) - last_complete).total_seconds() >= self.full_sync_interval
+
+    def sync(self, website_url: str, full: bool = False) -> Dict[str, Any]:
+        """Fetch catalog changes since the previous sync of this store"""
+        website_url = normalize_store_url(website_url)
+        key = store_host(website_url)
+        previous = self.store.get(key)
+        known: Dict[str, str] = dict(previous['products']) if previous else {}
+        full = full or self._needs_full_walk(previous)
+        # Without a watermark the walk never stops early
+        watermark = None
+        if previous and previous.get('newest_first') and not full:
+            watermark = _parse_timestamp(previous.get('last_updated_at'))
+
+        added: List[Dict[str, Any]] = []
+        changed: List[Dict[str, Any]] = []
+        seen = set()
+        unchanged_count = 0
+        pages = 0
+        last_page_size = 0
+        newest: Optional[datetime] = None
+        newest_raw: Optional[str] = previous.get('last_updated_at') if previous else None
+        prev_ts: Optional[datetime] = None
+        descending = True
+        prev_created: Optional[datetime] = None
+        created_descending = True
+        stopped_early = False
+        interrupted = False
+
+        page_iter = self.scraper._iter_product_pages(website_url)
+        try:
+            for page_products in page_iter:
+                pages += 1
+                last_page_size = len(page_products)
+                fresh = []
+
+                for product in page_products:
+                    product_id = str(product.get('id'))
+                    updated_raw = product.get('updated_at')
+                    updated_at = _parse_timestamp(updated_raw)
+
+                    if updated_at is not None:
+                        if prev_ts is not None and updated_at > prev_ts:
+                            descending = False
+                        prev_ts = updated_at
+                        if newest is None or updated_at > newest:
+                            newest, newest_raw = updated_at, updated_raw
+                    else:
+                        descending = False
+
+                    created_at = _parse_timestamp(product.get('created_at'))
+                    if created_at is not None:
+                        if prev_created is not None and created_at > prev_created:
+                            created_descending = False
+                        prev_created = created_at
+
+                    if product_id in seen:
+                        continue
+                    seen.add(product_id)
+
+                    if product_id not in known:
+                        fresh.append((added, product))
+                    elif known[product_id] != updated_raw:
+                        fresh.append((changed, product))
+                    else:
+                        unchanged_count += 1
+                        if descending and watermark is not None and updated_at <= watermark:
+                            stopped_early = True
+                            break
+
+                    known[product_id] = updated_raw
+
+                # Only products that are new or changed get normalised
+                for bucket, product in fresh:
+                    bucket.extend(self.scraper._parse_products([product], website_url))
+
+                if stopped_early:
+                    break
+        except ProductPageError as e:
+            interrupted = True
+            logger.warning(f"Catalog sync for {key} stopped after {pages} pages: {str(e)}")
+        finally:
+            page_iter.close()
+
+        if interrupted:
+            # Products past the failed page may be newer than the old watermark
+            newest_raw = previous.get('last_updated_at') if previous else None
+
+        # The walk covered the whole catalog unless it stopped at the
+        # watermark, hit a failed page or ran into the page cap. An empty
+        # walk is never trusted for removals, since an unavailable endpoint
+        # looks the same.
+        complete = pages > 0 and not stopped_early and not interrupted and (
+            pages < self.scraper.max_product_pages or last_page_size < PRODUCTS_PAGE_LIMIT
+        )
+
+        # Ordering is only learned from a complete walk that could not have
+        # been in created_at order, and dropped as soon as a walk sees
+        # products out of order
+        was_newest_first = bool(previous and previous.get('newest_first'))
+        if complete:
+            newest_first = descending and (was_newest_first or not created_descending)
+        else:
+            newest_first = was_newest_first and descending
+
+        removed: List[str] = []
+        if complete:
+            removed = [product_id for product_id in known if product_id not in seen]
+            for product_id in removed:
+                del known[product_id]
+
+        synced_at = datetime.now(timezone.utc).isoformat()
+        if complete:
+            last_complete_at, syncs_since_complete = synced_at, 0
+        else:
+            last_complete_at = previous.get('last_complete_at') if previous else None
+            syncs_since_complete = (previous.get('syncs_since_complete', 0) if previous else 0) + 1
+
+        self.store.set(key, {
+            'last_updated_at': newest_raw,
+            'products': known,
+            'newest_first': newest_first,
+            'synced_at': synced_at,
+            'last_complete_at': last_complete_at,
+            'syncs_since_complete': syncs_since_complete
+        })
+
+        logger.info(
+            f"Catalog sync for {key}: {len(added)} added, {len(changed)} changed, "
+            f"{len(removed)} removed over {pages} pages"
+        )
+        return {
+            'website_url': website_url,
+            'added': added,
+            'changed': changed,
+            'removed': removed,
+            'unchanged_count': unchanged_count,
+            'pages_fetched': pages,
+            'complete': complete
+        }
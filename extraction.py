@@ -0,0 +1,156 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+import trafilatura
+from metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTRACT_TIMEOUT = 10.0
+DEFAULT_MAX_TASKS_PER_WORKER = 200
+
+EXTRACT_TASKS = Counter('infofetch_extract_tasks_total',
+                        'Text extractions sent to the process pool by outcome', ['outcome'])
+
+class ExtractionError(Exception):
+    """Extraction did not finish: the task timed out or its worker failed"""
+
+
+# Imported once by the forkserver, so every worker starts with them loaded
+FORKSERVER_PRELOAD = [__name__, 'trafilatura', 'lxml.html']
+
+WARM_UP_PAGE = b'<html><body><article><p>Warm up the extractor.</p></article></body></html>'
+
+
+def extract_text(content: bytes) -> Optional[str]:
+    """trafilatura.extract on raw page bytes; runs inside a pool worker"""
+    return trafilatura.extract(content)
+
+
+def _warm_up() -> None:
+    """Worker initializer: run one extraction so lazy setup is paid before real tasks"""
+    extract_text(WARM_UP_PAGE)
+
+
+class ExtractionPool:
+    """
+    Runs trafilatura.extract in worker processes, so extraction no longer
+    holds the GIL of the serving process. Page bytes go in and text comes
+    out. Workers are forked from a server that has trafilatura imported and
+    warm themselves up on start; each is replaced after
+    max_tasks_per_worker tasks to contain memory growth. A task that misses
+    its timeout (queueing included) or whose worker fails raises
+    ExtractionError, so callers can tell it from a page without text.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 timeout: float = DEFAULT_EXTRACT_TIMEOUT,
+                 max_tasks_per_worker: int = DEFAULT_MAX_TASKS_PER_WORKER):
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.timeout = timeout
+        self.max_tasks_per_worker = max(1, max_tasks_per_worker)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Lazily start the worker processes"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # Worker recycling is not available with fork, which is
+                    # also unsafe in a threaded server
+                    if 'forkserver' in multiprocessing.get_all_start_methods():
+                        context = multiprocessing.get_context('forkserver')
+                        context.set_forkserver_preload(FORKSERVER_PRELOAD)
+                    else:
+                        context = multiprocessing.get_context('spawn')
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=context,
+                        initializer=_warm_up,
+                        max_tasks_per_child=self.max_tasks_per_worker
+                    )
+                    # Workers start on demand; start them all now so the
+                    # first pages do not wait for a cold worker
+                    for _ in range(self.max_workers):
+                        self._executor.submit(os.getpid)
+        return self._executor
+
+    def _retire(self, executor: ProcessPoolExecutor, kill: bool = False) -> None:
+        """
+        Send new tasks to a fresh pool. Tasks already running on the old one
+        finish normally and its workers exit once they are done, unless kill
+        is set: then its workers are killed at once, so a hung task does not
+        keep a whole set of processes alive next to the new pool.
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        processes = _worker_processes(executor) if kill else []
+        executor.shutdown(wait=False, cancel_futures=kill)
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+
+    def _submit(self, content: bytes) -> Tuple[ProcessPoolExecutor, Future]:
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(extract_text, content)
+        except RuntimeError:
+            # Broken, or retired by another thread since it was looked up
+            self._retire(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(extract_text, content)
+
+    def extract(self, content: bytes) -> Optional[str]:
+        """Main text of an HTML page; raises ExtractionError when extraction timed out or failed"""
+        try:
+            executor, future = self._submit(content)
+        except RuntimeError as e:
+            EXTRACT_TASKS.labels('failed').inc()
+            logger.error(f"Could not start text extraction: {str(e)}")
+            raise ExtractionError(f"Could not start text extraction: {str(e)}") from e
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeout as e:
+            EXTRACT_TASKS.labels('timeout').inc()
+            if not future.cancel():
+                # The task keeps its worker busy; stop queueing behind it
+                logger.warning(f"Text extraction exceeded {self.timeout}s, replacing the extraction pool")
+                self._retire(executor, kill=True)
+            raise ExtractionError(f"Text extraction exceeded {self.timeout}s") from e
+        except BrokenProcessPool as e:
+            EXTRACT_TASKS.labels('failed').inc()
+            logger.error(f"Text extraction worker died: {str(e)}")
+            self._retire(executor)
+            raise ExtractionError(f"Text extraction worker died: {str(e)}") from e
+        except Exception as e:
+            EXTRACT_TASKS.labels('failed').inc()
+            logger.error(f"Text extraction failed: {str(e)}")
+            raise ExtractionError(f"Text extraction failed: {str(e)}") from e
+        EXTRACT_TASKS.labels('ok').inc()
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+def _worker_processes(executor: ProcessPoolExecutor) -> List[multiprocessing.Process]:
+    """
+    The worker processes of an executor, which has no public handle on
+    them. Empty if that private attribute changes, in which case a hung
+    worker is only stopped by shutdown() once its task ends.
+    """
+    processes = getattr(executor, '_processes', None)
+    if not isinstance(processes, dict):
+        logger.warning("Cannot reach extraction worker processes; hung workers will not be killed")
+        return []
+    return list(processes.values())
+
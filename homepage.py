@@ -0,0 +1,208 @@
+import abc
+import re
+from typing import Dict, List, Optional, Pattern, Tuple
+from bs4 import BeautifulSoup, CData, NavigableString
+from lxml import html
+from html_parsers import element_text, iter_strings, make_soup, parse_document
+
+# Same string types BeautifulSoup.get_text() joins by default
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+# Anchors inside these elements count as navigation links
+NAV_TAGS = ('nav', 'header', 'footer')
+
+PRICE_CLASS = re.compile(r'price', re.I)
+
+# XPath equivalents for the lxml.html backend; XPath 1.0 has no
+# case-insensitive match, so the class is lowercased with translate()
+NAV_ANCHORS_XPATH = '//*[self::nav or self::header or self::footer]//a[@href]'
+PRICE_XPATH = (
+    "(.//*[contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', "
+    "'abcdefghijklmnopqrstuvwxyz'), 'price')])[1]"
+)
+
+
+class Anchor:
+    """An <a href> on the homepage with its text resolved once"""
+    __slots__ = ('href', 'text', 'in_nav', 'node')
+
+    def __init__(self, href: str, node, in_nav: bool, text: str = ''):
+        self.href = href
+        self.node = node
+        self.in_nav = in_nav
+        self.text = text
+
+
+class HomepageIndex(abc.ABC):
+    """
+    Compact index of a homepage, built once per scrape and read by every
+    homepage extractor: the anchors, the page text (identical to
+    soup.get_text()), every string for keyword lookups, the title, meta tags
+    and images, so extractors never re-traverse the tree. Subclasses fill it
+    from a BeautifulSoup tree or an lxml.html document.
+    """
+
+    def __init__(self):
+        self.anchors: List[Anchor] = []
+        self.title_text: Optional[str] = None
+        self.metas: List[Dict[str, str]] = []
+        self.images: List[Dict[str, str]] = []
+        self._text_parts: List[str] = []
+        self._text: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """Page text, equal to soup.get_text()"""
+        if self._text is None:
+            self._text = ''.join(self._text_parts)
+        return self._text
+
+    def meta_content(self, **attrs: str) -> Optional[str]:
+        """Content of the first meta tag whose attributes match all of attrs"""
+        for meta in self.metas:
+            if all(meta.get(key) == value for key, value in attrs.items()):
+                return meta.get('content')
+        return None
+
+    def has_meta(self, **attrs: str) -> bool:
+        return any(all(meta.get(key) == value for key, value in attrs.items()) for meta in self.metas)
+
+    def first_image_alt(self) -> Optional[str]:
+        """Alt text of the first <img> carrying an alt attribute, even an empty one"""
+        for image in self.images:
+            if image.get('alt') is not None:
+                return image['alt']
+        return None
+
+    def product_anchors(self) -> List[Anchor]:
+        """Anchors linking to product pages, in document order"""
+        return [anchor for anchor in self.anchors if '/products/' in anchor.href]
+
+    def nav_anchors(self) -> List[Anchor]:
+        """Anchors inside nav, header or footer elements, in document order"""
+        return [anchor for anchor in self.anchors if anchor.in_nav]
+
+    @abc.abstractmethod
+    def string_context(self, pattern: Pattern) -> Optional[str]:
+        """Text of the element holding the first string matching pattern"""
+
+    @abc.abstractmethod
+    def anchor_image(self, anchor: Anchor) -> Optional[str]:
+        """src of the first image inside an anchor"""
+
+    @abc.abstractmethod
+    def anchor_price(self, anchor: Anchor) -> Optional[str]:
+        """Text of the first price-classed element inside an anchor"""
+
+
+class SoupHomepageIndex(HomepageIndex):
+    """HomepageIndex built by a single walk of a BeautifulSoup tree"""
+
+    def __init__(self, soup: BeautifulSoup):
+        super().__init__()
+        # Every string in document order, including comments and scripts,
+        # matching what soup.find(string=...) searches
+        self.strings: List[NavigableString] = []
+        self._walk(soup)
+
+    def _walk(self, soup: BeautifulSoup) -> None:
+        text_parts = self._text_parts
+        # Stack of (node, inside nav/header/footer); an (anchor, text offset)
+        # pair marks the end of that anchor's subtree. Children are pushed in
+        # reverse so nodes pop in document order.
+        stack = [(soup, False)]
+        while stack:
+            node, state = stack.pop()
+
+            if isinstance(node, Anchor):
+                node.text = ''.join(text_parts[state:])
+                continue
+
+            if isinstance(node, NavigableString):
+                self.strings.append(node)
+                if type(node) in TEXT_STRING_TYPES:
+                    text_parts.append(node)
+                continue
+
+            name = node.name
+            if name == 'a':
+                href = node.get('href')
+                if href is not None:
+                    anchor = Anchor(href, node, state)
+                    self.anchors.append(anchor)
+                    stack.append((anchor, len(text_parts)))
+            elif name == 'meta':
+                self.metas.append(node.attrs)
+            elif name == 'img':
+                self.images.append(node.attrs)
+            elif name == 'title' and self.title_text is None:
+                self.title_text = node.get_text()
+
+            in_nav = state or name in NAV_TAGS
+            stack.extend((child, in_nav) for child in reversed(node.contents))
+
+    def string_context(self, pattern: Pattern) -> Optional[str]:
+        for string in self.strings:
+            if pattern.search(string):
+                return string.parent.get_text() if string.parent is not None else None
+        return None
+
+    def anchor_image(self, anchor: Anchor) -> Optional[str]:
+        img = anchor.node.find('img')
+        return img.get('src') if img else None
+
+    def anchor_price(self, anchor: Anchor) -> Optional[str]:
+        price_elem = anchor.node.find(class_=PRICE_CLASS)
+        return price_elem.get_text() if price_elem else None
+
+
+class LxmlHomepageIndex(HomepageIndex):
+    """
+    HomepageIndex built from an lxml.html document: anchors, title, meta
+    tags and images come from XPath queries, the text from one string walk.
+    """
+
+    def __init__(self, document: Optional[html.HtmlElement]):
+        super().__init__()
+        # (string, owning element) in document order, comments and scripts included
+        self.strings: List[Tuple[str, Optional[html.HtmlElement]]] = []
+        if document is not None:
+            self._index(document)
+
+    def _index(self, document: html.HtmlElement) -> None:
+        for string, owner, container, is_comment in iter_strings(document):
+            self.strings.append((string, owner))
+            if container is None and not is_comment:
+                self._text_parts.append(string)
+
+        nav_anchors = set(document.xpath(NAV_ANCHORS_XPATH))
+        self.anchors = [
+            Anchor(a.get('href'), a, a in nav_anchors, element_text(a))
+            for a in document.xpath('//a[@href]')
+        ]
+        titles = document.xpath('(//title)[1]')
+        if titles:
+            self.title_text = element_text(titles[0])
+        self.metas = [dict(meta.attrib) for meta in document.xpath('//meta')]
+        self.images = [dict(img.attrib) for img in document.xpath('//img')]
+
+    def string_context(self, pattern: Pattern) -> Optional[str]:
+        for string, owner in self.strings:
+            if pattern.search(string):
+                return element_text(owner) if owner is not None else None
+        return None
+
+    def anchor_image(self, anchor: Anchor) -> Optional[str]:
+        images = anchor.node.xpath('(.//img)[1]')
+        return images[0].get('src') if images else None
+
+    def anchor_price(self, anchor: Anchor) -> Optional[str]:
+        prices = anchor.node.xpath(PRICE_XPATH)
+        return element_text(prices[0]) if prices else None
+
+
+def build_homepage_index(content: bytes, backend: str) -> HomepageIndex:
+    """Parse a homepage with the given parser backend and index it"""
+    if backend == 'lxml.html':
+        return LxmlHomepageIndex(parse_document(content))
+    return SoupHomepageIndex(make_soup(content, backend))
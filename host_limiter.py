@@ -0,0 +1,300 @@
+import time
+import asyncio
+import logging
+import threading
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import requests
+from requests.adapters import BaseAdapter
+from metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST_RATE = 10.0
+# Sized so a cold scrape with racing paths (about 26 requests to one host,
+# on up to 8 stage and 16 probe workers) is not slowed; see the limiter
+# runs of benchmarks/scrape_suite.py
+DEFAULT_HOST_BURST = 40
+DEFAULT_HOST_MAX_IN_FLIGHT = 16
+DEFAULT_MAX_RETRY_AFTER = 30.0
+# Back-off for a 429 that carries no usable Retry-After
+DEFAULT_THROTTLE_BACKOFF = 1.0
+
+# Responses whose Retry-After pauses the host
+THROTTLE_STATUSES = (429, 503)
+
+# Idle hosts are forgotten once this many are tracked
+MAX_TRACKED_HOSTS = 4096
+
+LIMITER_WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LIMITER_QUEUED = Gauge('infofetch_host_limiter_queued_requests',
+                       'Requests waiting for a per-host rate limit token or in-flight slot', ['engine'])
+LIMITER_IN_FLIGHT = Gauge('infofetch_host_limiter_in_flight_requests',
+                          'Requests to stores holding a per-host in-flight slot', ['engine'])
+LIMITER_WAIT_SECONDS = Histogram('infofetch_host_limiter_wait_seconds',
+                                 'Time requests waited for the per-host limiter', ['engine'],
+                                 buckets=LIMITER_WAIT_BUCKETS)
+LIMITER_THROTTLED = Counter('infofetch_host_limiter_throttled_total',
+                            'Throttling responses (429/503) that paused a host', ['engine'])
+
+
+def request_host(url: str) -> str:
+    """Host key of a request URL; www and the bare domain share one budget"""
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header, given as seconds or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class _HostState:
+    __slots__ = ('tokens', 'updated', 'in_flight', 'waiting', 'paused_until')
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.in_flight = 0
+        self.waiting = 0
+        self.paused_until = 0.0
+
+
+class HostLimiter:
+    """
+    Process-wide limits on the requests sent to each store host: a token
+    bucket of rate requests per second with room for burst (no rate limit
+    when rate is 0), and at most max_in_flight requests at once. A 429 or 503 pauses the host for its
+    Retry-After (capped at max_retry_after). One limiter is shared by every
+    scrape and both engines; threads block in acquire(), coroutines await
+    acquire_async().
+    """
+
+    def __init__(self, rate: float = DEFAULT_HOST_RATE, burst: int = DEFAULT_HOST_BURST,
+                 max_in_flight: int = DEFAULT_HOST_MAX_IN_FLIGHT,
+                 max_retry_after: float = DEFAULT_MAX_RETRY_AFTER):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retry_after = max_retry_after
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        # Coroutines waiting for an in-flight slot, by host
+        self._async_waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+
+    def _state(self, host: str, now: float) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            if len(self._hosts) >= MAX_TRACKED_HOSTS:
+                self._forget_idle(now)
+            state = self._hosts[host] = _HostState(float(self.burst), now)
+        return state
+
+    def _forget_idle(self, now: float) -> None:
+        for host in [host for host, state in self._hosts.items()
+                     if not state.in_flight and not state.waiting and state.paused_until <= now]:
+            del self._hosts[host]
+
+    def _try_acquire(self, state: _HostState, now: float) -> Optional[float]:
+        """
+        Take a token and an in-flight slot and return 0, or return the
+        seconds until a token is due, or None to wait for a slot to free up
+        """
+        if state.paused_until > now:
+            return state.paused_until - now
+        if state.in_flight >= self.max_in_flight:
+            return None
+        if self.rate <= 0:
+            state.in_flight += 1
+            return 0.0
+        state.tokens = min(float(self.burst), state.tokens + (now - state.updated) * self.rate)
+        state.updated = now
+        if state.tokens < 1:
+            return (1 - state.tokens) / self.rate
+        state.tokens -= 1
+        state.in_flight += 1
+        return 0.0
+
+    def acquire(self, host: str, engine: str = 'sync') -> None:
+        """Block until a request to host may start"""
+        start = time.monotonic()
+        with self._lock:
+            state = self._state(host, start)
+            delay = self._try_acquire(state, start)
+            if delay != 0.0:
+                state.waiting += 1
+                LIMITER_QUEUED.labels(engine).inc()
+                try:
+                    while delay != 0.0:
+                        self._released.wait(delay)
+                        delay = self._try_acquire(state, time.monotonic())
+                finally:
+                    state.waiting -= 1
+                    LIMITER_QUEUED.labels(engine).dec()
+        self._started(engine, start)
+
+    async def acquire_async(self, host: str, engine: str = 'async') -> None:
+        """Wait, without blocking the event loop, until a request to host may start"""
+        start = time.monotonic()
+        queued = False
+        try:
+            while True:
+                waiter = None
+                with self._lock:
+                    # A host with waiters is never forgotten, so this stays the same state
+                    state = self._state(host, time.monotonic())
+                    delay = self._try_acquire(state, time.monotonic())
+                    if delay == 0.0:
+                        break
+                    if not queued:
+                        queued = True
+                        state.waiting += 1
+                        LIMITER_QUEUED.labels(engine).inc()
+                    if delay is None:
+                        # Registered under the lock, so no release() is missed
+                        loop = asyncio.get_running_loop()
+                        waiter = loop.create_future()
+                        self._async_waiters.setdefault(host, []).append((loop, waiter))
+                if waiter is None:
+                    await asyncio.sleep(delay)
+                else:
+                    await waiter
+        finally:
+            if queued:
+                with self._lock:
+                    state.waiting -= 1
+                LIMITER_QUEUED.labels(engine).dec()
+        self._started(engine, start)
+
+    def _started(self, engine: str, start: float) -> None:
+        LIMITER_WAIT_SECONDS.labels(engine).observe(time.monotonic() - start)
+        LIMITER_IN_FLIGHT.labels(engine).inc()
+
+    def release(self, host: str, engine: str = 'sync') -> None:
+        """Free the in-flight slot taken by acquire()"""
+        LIMITER_IN_FLIGHT.labels(engine).dec()
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is not None:
+                state.in_flight -= 1
+            waiters = self._async_waiters.pop(host, [])
+            self._released.notify_all()
+        for loop, waiter in waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_wake, waiter)
+
+    def throttled(self, host: str, status: int, retry_after: Optional[str], engine: str = 'sync') -> bool:
+        """
+        Pause host after a throttling response. Returns True when the
+        request should be sent again once the pause is over.
+        """
+        if status not in THROTTLE_STATUSES:
+            return False
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            if status != 429:
+                return False
+            delay = DEFAULT_THROTTLE_BACKOFF
+        if delay > self.max_retry_after:
+            logger.warning(f"{host} asked to wait {delay:.0f}s, pausing it for {self.max_retry_after:.0f}s")
+            delay = self.max_retry_after
+        LIMITER_THROTTLED.labels(engine).inc()
+        with self._lock:
+            state = self._state(host, time.monotonic())
+            state.paused_until = max(state.paused_until, time.monotonic() + delay)
+        logger.info(f"{host} returned {status}, pausing requests to it for {delay:.1f}s")
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hosts': len(self._hosts),
+                'queued': sum(state.waiting for state in self._hosts.values()),
+                'in_flight': sum(state.in_flight for state in self._hosts.values()),
+            }
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class RateLimitedAdapter(BaseAdapter):
+    """
+    Transport adapter that sends every request of a requests session
+    through a HostLimiter, retrying once after a honoured Retry-After.
+    Limiting per hop rather than per session.get keeps a redirect from
+    waiting on the slot its own first hop holds. A request keeps its
+    in-flight slot until its body has been read or the response closed, so
+    streamed sitemaps and large catalog pages count for their whole
+    download.
+    """
+
+    def __init__(self, adapter: BaseAdapter, limiter: HostLimiter):
+        super().__init__()
+        self.adapter = adapter
+        self.limiter = limiter
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        host = request_host(request.url)
+        for attempt in range(2):
+            self.limiter.acquire(host)
+            try:
+                response = self.adapter.send(request, **kwargs)
+            except BaseException:
+                self.limiter.release(host)
+                raise
+            self._release_with_body(response, host)
+            retry = self.limiter.throttled(host, response.status_code, response.headers.get('Retry-After'))
+            if not retry or attempt:
+                return response
+            response.close()
+        return response
+
+    def _release_with_body(self, response: requests.Response, host: str) -> None:
+        """Free the slot of host once the response body is done with, exactly once"""
+        lock = threading.Lock()
+        released = []
+
+        def release() -> None:
+            with lock:
+                if released:
+                    return
+                released.append(True)
+            self.limiter.release(host)
+
+        raw = response.raw
+        # Bodies read by an inner adapter (the HTTP cache) are already done
+        if response._content is not False or raw is None or not hasattr(raw, 'release_conn'):
+            release()
+            return
+
+        # urllib3 hands the connection back once the body is read to the
+        # end, and Response.close() does the same
+        release_conn = raw.release_conn
+
+        def release_with_connection() -> None:
+            try:
+                release_conn()
+            finally:
+                release()
+
+        raw.release_conn = release_with_connection
+        # A streamed response dropped without being closed still frees its slot
+        weakref.finalize(response, release)
+
+    def close(self) -> None:
+        self.adapter.close()
@@ -0,0 +1,98 @@
+import logging
+from typing import Iterator, Optional, Tuple
+from bs4 import BeautifulSoup
+from bs4.dammit import EncodingDetector
+from lxml import etree, html
+
+logger = logging.getLogger(__name__)
+
+# Pure-Python html.parser and lxml through BeautifulSoup, or lxml.html
+# directly with XPath-based extractors
+PARSER_BACKENDS = ('html.parser', 'lxml', 'lxml.html')
+DEFAULT_PARSER_BACKEND = 'lxml'
+
+# Elements whose strings BeautifulSoup keeps out of get_text() of other
+# elements (scripts, styles, templates and ruby annotations)
+STRING_CONTAINERS = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+
+
+def check_parser_backend(backend: str) -> str:
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend {backend!r}, expected one of {', '.join(PARSER_BACKENDS)}")
+    return backend
+
+
+def make_soup(content: bytes, backend: str) -> BeautifulSoup:
+    """Parse a page with BeautifulSoup on the given tree builder"""
+    return BeautifulSoup(content, backend)
+
+
+def parse_document(content: bytes) -> Optional[html.HtmlElement]:
+    """
+    Parse a page with lxml.html. The declared charset is honoured and UTF-8
+    assumed otherwise. Returns None for empty or unparseable pages.
+    """
+    encoding = EncodingDetector.find_declared_encoding(content, is_html=True) or 'utf-8'
+    try:
+        parser = html.HTMLParser(encoding=encoding)
+    except LookupError:
+        parser = html.HTMLParser(encoding='utf-8')
+    try:
+        return html.document_fromstring(content, parser=parser)
+    except (etree.ParserError, ValueError) as e:
+        logger.debug(f"Could not parse page with lxml.html: {str(e)}")
+        return None
+
+
+def _container_of(element, inherited: Optional[str]) -> Optional[str]:
+    tag = element.tag
+    return tag if isinstance(tag, str) and tag in STRING_CONTAINERS else inherited
+
+
+def iter_strings(root) -> Iterator[Tuple[str, object, Optional[str], bool]]:
+    """
+    Yield (string, owner element, container, is_comment) for every string
+    under root in document order. container is the innermost enclosing
+    script/style/template/ruby element name, or None for ordinary text, which
+    mirrors the string types BeautifulSoup assigns.
+    """
+    # Strings under root still take the container of root's ancestors
+    inherited = None
+    for ancestor in root.iterancestors():
+        inherited = _container_of(ancestor, None)
+        if inherited:
+            break
+
+    # Stack items are (element, container of its parent) or a tail marker
+    # (None, (tail, owner, container))
+    stack = [(root, inherited)]
+    while stack:
+        element, state = stack.pop()
+        if element is None:
+            tail, owner, container = state
+            yield tail, owner, container, False
+            continue
+
+        parent = element.getparent()
+        if element is not root and element.tail:
+            stack.append((None, (element.tail, parent, state)))
+
+        if not isinstance(element.tag, str):
+            # Comments and processing instructions
+            if element.text:
+                yield element.text, parent, state, True
+            continue
+
+        container = _container_of(element, state)
+        if element.text:
+            yield element.text, element, container, False
+        stack.extend((child, container) for child in reversed(element))
+
+
+def element_text(element) -> str:
+    """Text of an lxml element, equal to BeautifulSoup's Tag.get_text()"""
+    own = _container_of(element, None)
+    return ''.join(
+        string for string, _, container, is_comment in iter_strings(element)
+        if not is_comment and container == own
+    )
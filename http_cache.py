@@ -0,0 +1,282 @@
+import hashlib
+import json
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_CACHE_BYTES = 512 * 1024 * 1024
+
+# Response headers kept with a cached body and replayed on a 304
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+@dataclass
+class CacheEntry:
+    """A cached response body with its validators"""
+    url: str
+    content: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    stored_at: float = field(default_factory=time.time)
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get('ETag')
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get('Last-Modified')
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+
+class MemoryLRUStore:
+    """In-memory cache store evicting least recently used entries by total body size"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.size
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.size
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+
+class DiskStore:
+    """
+    On-disk cache store. Each entry is one file holding a JSON header line
+    followed by the raw body; the least recently used files are evicted once
+    the directory exceeds max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_DISK_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # file name -> size for every entry on disk, least recently used first
+        self._index: 'OrderedDict[str, int]' = OrderedDict()
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self) -> None:
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.entry'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._index[name] = size
+            self._size += size
+
+    @staticmethod
+    def _file_name(key: str) -> str:
+        return hashlib.sha256(key.encode('utf-8')).hexdigest() + '.entry'
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        name = self._file_name(key)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug(f"Dropping unreadable cache entry {name}: {str(e)}")
+            self.delete(key)
+            return None
+
+        with self._lock:
+            if name in self._index:
+                self._index.move_to_end(name)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return CacheEntry(url=meta['url'], content=content, headers=meta['headers'], stored_at=meta['stored_at'])
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        name = self._file_name(key)
+        path = os.path.join(self.directory, name)
+        meta = json.dumps({'url': entry.url, 'headers': entry.headers, 'stored_at': entry.stored_at})
+        data = meta.encode('utf-8') + b'\n' + entry.content
+        if len(data) > self.max_bytes:
+            return
+
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry for {entry.url}: {str(e)}")
+            return
+
+        evict = []
+        with self._lock:
+            self._size -= self._index.pop(name, 0)
+            self._index[name] = len(data)
+            self._size += len(data)
+            while self._size > self.max_bytes and self._index:
+                evicted, size = self._index.popitem(last=False)
+                self._size -= size
+                evict.append(evicted)
+        for evicted in evict:
+            try:
+                os.remove(os.path.join(self.directory, evicted))
+            except OSError:
+                pass
+
+    def delete(self, key: str) -> None:
+        name = self._file_name(key)
+        with self._lock:
+            self._size -= self._index.pop(name, 0)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+
+class HTTPCache:
+    """
+    Conditional-request cache. Responses carrying an ETag or Last-Modified
+    validator are stored; repeat requests send If-None-Match /
+    If-Modified-Since and a 304 is answered from the stored body.
+    """
+
+    def __init__(self, store=None):
+        self.store = store if store is not None else MemoryLRUStore()
+        self._counts = {'hits': 0, 'misses': 0, 'stores': 0}
+
+    def _count(self, name: str) -> None:
+        # Plain dict increments; exact totals are not worth a lock here
+        self._counts[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._counts, bytes=self.store.size)
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        return self.store.get(url)
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """Validator headers to send for a cached entry"""
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def resolve(self, url: str, entry: Optional[CacheEntry], status: int,
+                headers, content: bytes) -> Tuple[int, bytes, bool]:
+        """
+        Reconcile an upstream response with the cache.
+        Returns the effective (status, body, from_cache).
+        """
+        if status == 304 and entry is not None:
+            self._count('hits')
+            return 200, entry.content, True
+
+        self._count('misses')
+        if status == 200 and self._is_cacheable(headers):
+            stored = {name: headers[name] for name in STORED_HEADERS if headers.get(name)}
+            self.store.set(url, CacheEntry(url=url, content=content, headers=stored))
+            self._count('stores')
+        elif status in (404, 410) and entry is not None:
+            self.store.delete(url)
+        return status, content, False
+
+    @staticmethod
+    def _is_cacheable(headers) -> bool:
+        if not (headers.get('ETag') or headers.get('Last-Modified')):
+            return False
+        return 'no-store' not in headers.get('Cache-Control', '').lower()
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """requests adapter that routes plain GETs through an HTTPCache"""
+
+    def __init__(self, cache: HTTPCache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, **kwargs) -> requests.Response:
+        # Streaming bodies are consumed by the caller, so they bypass the cache
+        if request.method != 'GET' or stream:
+            return super().send(request, stream=stream, **kwargs)
+
+        entry = self.cache.lookup(request.url)
+        validators = self.cache.conditional_headers(entry)
+        if validators:
+            # requests rebuilds redirects from the caller's request, so the
+            # validators for this URL go on a copy and never follow a redirect
+            request = request.copy()
+            for name, value in validators.items():
+                request.headers.setdefault(name, value)
+
+        response = super().send(request, stream=False, **kwargs)
+        status, content, from_cache = self.cache.resolve(
+            request.url, entry, response.status_code, response.headers, response.content
+        )
+
+        response.from_cache = from_cache
+        if from_cache:
+            response.status_code = status
+            response.reason = 'OK'
+            response._content = content
+            response._content_consumed = True
+            response.headers.pop('Content-Length', None)
+            for name, value in entry.headers.items():
+                response.headers[name] = value
+            response.encoding = get_encoding_from_headers(response.headers)
+        return response
@@ -0,0 +1,191 @@
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from scraper import POOL_BUSY_WORKERS, POOL_MAX_WORKERS, POOL_QUEUED_TASKS, SectionCallback
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_WORKERS = 4
+DEFAULT_MAX_QUEUED_JOBS = 100
+DEFAULT_JOB_RETENTION = 3600
+DEFAULT_MAX_RETAINED_BYTES = 128 * 1024 * 1024
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+
+INTERNAL_ERROR = {
+    'error': 'Internal server error',
+    'message': 'An unexpected error occurred while processing your request'
+}
+
+
+class JobFailed(Exception):
+    """Raised by a job's work to finish it with an HTTP-style error"""
+
+    def __init__(self, status: int, body: Dict[str, str]):
+        super().__init__(body.get('message', ''))
+        self.status = status
+        self.body = body
+
+
+class Job:
+    """One background scrape and everything a poller can see of it"""
+
+    def __init__(self, website_url: str):
+        self.id = uuid.uuid4().hex
+        self.website_url = website_url
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Sections reported so far while running; the full result once done
+        self.partial: Dict[str, Any] = {}
+        self.result: Optional[Dict[str, Any]] = None
+        self.cache: Optional[str] = None
+        self.error_status: Optional[int] = None
+        self.error: Optional[Dict[str, str]] = None
+        self._lock = threading.Lock()
+
+    def add_section(self, name: str, value: Any) -> None:
+        with self._lock:
+            self.partial[name] = value
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            job = {
+                'job_id': self.id,
+                'status': self.status,
+                'website_url': self.website_url,
+                'created_at': _timestamp(self.created_at),
+                'started_at': _timestamp(self.started_at),
+                'finished_at': _timestamp(self.finished_at),
+            }
+            if self.status == SUCCEEDED:
+                job['result'] = self.result
+                job['cache'] = self.cache
+            elif self.status == FAILED:
+                job['http_status'] = self.error_status
+                job.update(self.error or {})
+            else:
+                job['partial'] = dict(self.partial)
+            return job
+
+
+class JobQueue:
+    """
+    Runs scrapes as background jobs on a bounded pool. At most max_queued
+    jobs wait for a worker, so submit() refuses work instead of letting the
+    backlog grow. Finished jobs are kept for retention seconds, within an
+    approximate memory bound of max_retained_bytes; the oldest finished
+    jobs are dropped first when it is exceeded.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_JOB_WORKERS,
+                 max_queued: int = DEFAULT_MAX_QUEUED_JOBS,
+                 retention: float = DEFAULT_JOB_RETENTION,
+                 max_retained_bytes: int = DEFAULT_MAX_RETAINED_BYTES, name: str = 'jobs'):
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max(1, max_queued)
+        self.retention = retention
+        self.max_retained_bytes = max_retained_bytes
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._jobs: Dict[str, Job] = {}
+        # Finished job id -> approximate size, oldest first
+        self._finished: 'OrderedDict[str, int]' = OrderedDict()
+        self._finished_bytes = 0
+        self._queued = 0
+        self._lock = threading.Lock()
+        self._queued_gauge = POOL_QUEUED_TASKS.labels(name)
+        self._busy_gauge = POOL_BUSY_WORKERS.labels(name)
+        POOL_MAX_WORKERS.labels(name).set(self.max_workers)
+
+    def submit(self, website_url: str, work: Callable[[SectionCallback], Any]) -> Optional[Job]:
+        """
+        Queue work(on_section) as a job, or return None when the queue is
+        full. work returns (result, cache status) or raises JobFailed.
+        """
+        with self._lock:
+            self._expire()
+            if self._queued >= self.max_queued:
+                return None
+            job = Job(website_url)
+            self._jobs[job.id] = job
+            self._queued += 1
+        self._queued_gauge.inc()
+        self._executor.submit(self._run, job, work)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._expire()
+            counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def _expire(self) -> None:
+        """Drop finished jobs older than the retention window"""
+        cutoff = time.time() - self.retention
+        for job_id in list(self._finished):
+            if self._jobs[job_id].finished_at >= cutoff:
+                break
+            self._forget(job_id)
+
+    def _forget(self, job_id: str) -> None:
+        self._finished_bytes -= self._finished.pop(job_id)
+        del self._jobs[job_id]
+
+    def _retain(self, job: Job) -> None:
+        """Account for a finished job, dropping the oldest ones beyond the memory bound"""
+        # Serialised size is a cheap, stable proxy for the memory a job holds
+        size = len(json.dumps(job.as_dict(), default=str))
+        with self._lock:
+            self._finished[job.id] = size
+            self._finished_bytes += size
+            # The newest job is always kept, so its poller can collect it
+            while self._finished_bytes > self.max_retained_bytes and len(self._finished) > 1:
+                job_id = next(iter(self._finished))
+                logger.info(f"Dropping finished job {job_id} early to stay within the job memory bound")
+                self._forget(job_id)
+
+    def _run(self, job: Job, work: Callable[[SectionCallback], Any]) -> None:
+        with self._lock:
+            self._queued -= 1
+        self._queued_gauge.dec()
+        self._busy_gauge.inc()
+        with job._lock:
+            job.status = RUNNING
+            job.started_at = time.time()
+        status, result, cache, error_status, error = FAILED, None, None, 500, INTERNAL_ERROR
+        try:
+            result, cache = work(job.add_section)
+            status, error_status, error = SUCCEEDED, None, None
+        except JobFailed as e:
+            error_status, error = e.status, e.body
+        except Exception as e:
+            logger.error(f"Job {job.id} for {job.website_url} failed: {str(e)}")
+        finally:
+            # The outcome becomes visible to pollers all at once
+            with job._lock:
+                job.status, job.result, job.cache = status, result, cache
+                job.error_status, job.error = error_status, error
+                job.finished_at = time.time()
+                job.partial = {}
+            self._busy_gauge.dec()
+            self._retain(job)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(value)) if value is not None else None
@@ -0,0 +1,97 @@
+import re
+import json
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Mapping, Optional, Pattern, Tuple
+
+# Keywords of the important link categories, in priority order
+DEFAULT_LINK_KEYWORDS: Dict[str, List[str]] = {
+    'order_tracking': ['track', 'tracking', 'order-status', 'track-order'],
+    'blog': ['blog', 'news', 'articles'],
+    'support': ['support', 'help', 'customer-service'],
+    'shipping': ['shipping', 'delivery'],
+    'size_guide': ['size-guide', 'sizing', 'size-chart'],
+    'gift_cards': ['gift-card', 'gift-cards'],
+    'wholesale': ['wholesale', 'trade', 'bulk']
+}
+
+
+class KeywordIndex:
+    """
+    Compiled keyword table for classifying links. All keywords are merged
+    into one regex shaped like a trie: alternatives are grouped by their
+    first character, which is consumed, and the rest is matched longest
+    first in a lookahead, so one scan reports every keyword occurrence,
+    overlapping ones included. Texts are matched lowercased, like the
+    keywords.
+    """
+
+    def __init__(self, table: Mapping[str, Iterable[str]]):
+        self.categories: Tuple[str, ...] = tuple(table)
+        owners: Dict[str, int] = {}
+        for rank, category in enumerate(self.categories):
+            keywords = table[category]
+            if isinstance(keywords, str):
+                raise ValueError(f"Keywords of link category {category!r} must be a list")
+            for keyword in keywords:
+                keyword = str(keyword).lower()
+                if not keyword or '\0' in keyword:
+                    raise ValueError(f"Invalid keyword {keyword!r} in link category {category!r}")
+                owners[keyword] = owners.get(keyword, 0) | (1 << rank)
+
+        # A match reports the longest keyword at its position; every keyword
+        # it starts with matched there as well
+        self._masks: Dict[str, int] = {}
+        for keyword in owners:
+            mask = 0
+            for other, other_mask in owners.items():
+                if keyword.startswith(other):
+                    mask |= other_mask
+            self._masks[keyword] = mask
+
+        by_first: Dict[str, List[str]] = {}
+        for keyword in owners:
+            by_first.setdefault(keyword[0], []).append(keyword[1:])
+        self._pattern: Optional[Pattern] = None
+        if by_first:
+            self._pattern = re.compile('|'.join(
+                f"{re.escape(first)}(?=({'|'.join(re.escape(rest) for rest in sorted(rests, key=len, reverse=True))}))"
+                for first, rests in by_first.items()
+            ))
+
+    def first_matches(self, texts: List[str]) -> Dict[int, int]:
+        """
+        Map each category rank to the index of the first lowercased text
+        holding one of its keywords, classifying all texts in a single scan
+        """
+        found: Dict[int, int] = {}
+        if self._pattern is None or not texts:
+            return found
+        # Keywords never contain NUL, so no match spans two texts
+        offsets = []
+        offset = 0
+        for text in texts:
+            offsets.append(offset)
+            offset += len(text) + 1
+        remaining = (1 << len(self.categories)) - 1
+        masks = self._masks
+        for match in self._pattern.finditer('\0'.join(texts)):
+            matched = masks[match.group(0) + match.group(match.lastindex)] & remaining
+            if not matched:
+                continue
+            position = bisect_right(offsets, match.start()) - 1
+            for rank in range(len(self.categories)):
+                if matched >> rank & 1:
+                    found[rank] = position
+            remaining &= ~matched
+            if not remaining:
+                break
+        return found
+
+
+def load_link_keywords(path: str) -> Dict[str, List[str]]:
+    """Read a keyword table from a JSON object mapping each category to its keywords"""
+    with open(path, encoding='utf-8') as f:
+        table = json.load(f)
+    if not isinstance(table, dict):
+        raise ValueError(f"{path} must hold a JSON object of category: [keywords]")
+    return table
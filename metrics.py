@@ -0,0 +1,274 @@
+import abc
+import bisect
+import itertools
+import threading
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# (sample name suffix, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricFamily:
+    """One metric with all of its samples, ready for exposition"""
+
+    def __init__(self, name: str, kind: str, documentation: str, samples: Iterable[Sample]):
+        self.name = name
+        self.kind = kind
+        self.documentation = documentation
+        self.samples = list(samples)
+
+
+class Registry:
+    """Metrics and collector callbacks rendered by /metrics"""
+
+    def __init__(self):
+        self._metrics: List['_Metric'] = []
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: '_Metric') -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """Add a callback producing metric families at scrape time"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> List[MetricFamily]:
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        families = [metric.collect() for metric in metrics]
+        for collector in collectors:
+            families.extend(collector())
+        return families
+
+    def exposition(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for family in self.collect():
+            lines.append(f"# HELP {family.name} {_escape_help(family.documentation)}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for suffix, labels, value in family.samples:
+                lines.append(f"{family.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class _ShardOwner:
+    """Per-thread object whose collection marks the end of a shard's thread"""
+    __slots__ = ('__weakref__',)
+
+
+class _Metric(abc.ABC):
+    """
+    Base for metrics updated on hot paths. Every thread writes to its own
+    shard, so updates take no lock; collection sums the shards. When a
+    thread ends, its shard is folded into a base total, so short-lived
+    request threads do not leave shards behind.
+    """
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: Dict[int, dict] = {}
+        self._shard_ids = itertools.count()
+        self._base: dict = {}
+        self._shards_lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            # Thread-local values are released when their thread ends
+            owner = self._local.owner = _ShardOwner()
+            with self._shards_lock:
+                shard_id = next(self._shard_ids)
+                self._shards[shard_id] = shard
+            finalizer = weakref.finalize(owner, self._fold, shard_id)
+            finalizer.atexit = False
+        return shard
+
+    def _fold(self, shard_id: int) -> None:
+        """Add the shard of a finished thread to the base total"""
+        with self._shards_lock:
+            shard = self._shards.pop(shard_id, None)
+            if shard:
+                self._merge(self._base, shard)
+
+    def _merge(self, totals: dict, shard: dict) -> None:
+        """Add the values of shard into totals, replacing rather than mutating them"""
+        for key, value in shard.items():
+            totals[key] = totals.get(key, 0.0) + value
+
+    def _snapshots(self) -> List[dict]:
+        with self._shards_lock:
+            shards = [self._base] + list(self._shards.values())
+        # Copying a dict is atomic under the GIL, so owners may keep writing
+        return [dict(shard) for shard in shards]
+
+    def _labels(self, values: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def labels(self, *values: str) -> '_Child':
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        return _Child(self, tuple(str(value) for value in values))
+
+    @abc.abstractmethod
+    def collect(self) -> MetricFamily:
+        """Current values of this metric as one family"""
+
+
+class _Child:
+    """A metric bound to one set of label values"""
+    __slots__ = ('_metric', '_key')
+
+    def __init__(self, metric: _Metric, key: Tuple[str, ...]):
+        self._metric = metric
+        self._key = key
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._metric._inc(self._key, amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._metric._inc(self._key, -amount)
+
+    def set(self, value: float) -> None:
+        self._metric._set(self._key, value)
+
+    def observe(self, value: float) -> None:
+        self._metric._observe(self._key, value)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._inc((), amount)
+
+    def _inc(self, key: Tuple[str, ...], amount: float) -> None:
+        shard = self._shard()
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def collect(self) -> MetricFamily:
+        totals: Dict[Tuple[str, ...], float] = {}
+        for shard in self._snapshots():
+            self._merge(totals, shard)
+        return MetricFamily(self.name, self.kind, self.documentation,
+                            (('', self._labels(key), value) for key, value in sorted(totals.items())))
+
+
+class Gauge(Counter):
+    """
+    Gauge whose inc/dec are sharded like a counter. set() stores an absolute
+    value that the sharded increments are added to.
+    """
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._inc((), -amount)
+
+    def set(self, value: float) -> None:
+        self._set((), value)
+
+    def _set(self, key: Tuple[str, ...], value: float) -> None:
+        self._values[key] = value
+
+    def collect(self) -> MetricFamily:
+        family = super().collect()
+        totals = {tuple(labels.get(name, '') for name in self.labelnames): value
+                  for _, labels, value in family.samples}
+        for key, value in dict(self._values).items():
+            totals[key] = totals.get(key, 0.0) + value
+        family.samples = [('', self._labels(key), value) for key, value in sorted(totals.items())]
+        return family
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional[Registry] = REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float) -> None:
+        self._observe((), value)
+
+    def _observe(self, key: Tuple[str, ...], value: float) -> None:
+        shard = self._shard()
+        state = shard.get(key)
+        if state is None:
+            # Per-bucket counts (the last one is +Inf), then sum and count
+            state = shard[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def _merge(self, totals: dict, shard: dict) -> None:
+        for key, state in shard.items():
+            # Copied first: the owning thread may still be updating it
+            state = list(state)
+            total = totals.get(key)
+            totals[key] = state if total is None else [a + b for a, b in zip(total, state)]
+
+    def collect(self) -> MetricFamily:
+        totals: Dict[Tuple[str, ...], list] = {}
+        for shard in self._snapshots():
+            self._merge(totals, shard)
+
+        samples: List[Sample] = []
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        for key, state in sorted(totals.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(bounds, state):
+                cumulative += count
+                samples.append(('_bucket', dict(labels, le=bound), cumulative))
+            samples.append(('_sum', labels, state[-2]))
+            samples.append(('_count', labels, state[-1]))
+        return MetricFamily(self.name, self.kind, self.documentation, samples)
+
+
+def status_class(status: int) -> str:
+    """HTTP status category label, e.g. 404 -> '4xx'"""
+    return f"{status // 100}xx" if 100 <= status < 600 else 'other'
+
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"') + '"'
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
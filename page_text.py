@@ -0,0 +1,89 @@
+import time
+import logging
+from typing import Callable, List, Optional, Tuple
+from lxml import etree, html
+from metrics import Counter, Histogram
+from policies import POLICY_BODY_XPATH, container_text
+
+logger = logging.getLogger(__name__)
+
+# Pages with no more text than this are treated as empty
+MIN_PAGE_TEXT_LENGTH = 100
+
+_RTE = "contains(concat(' ', normalize-space(@class), ' '), ' rte ')"
+# Rich-text blocks of the page body, skipping ones nested in another
+RTE_XPATH = f".//*[{_RTE} and not(ancestor::*[{_RTE}])]"
+MAIN_XPATH = "(//main | //*[@role='main'])[1]"
+# Parts of <main> that are not page content
+MAIN_NOISE_XPATH = './/nav | .//aside | .//form'
+
+EXTRACT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+EXTRACT_TIER_SECONDS = Histogram('infofetch_extract_tier_duration_seconds',
+                                 'Time spent in each page text extraction tier', ['tier'],
+                                 buckets=EXTRACT_BUCKETS)
+EXTRACT_TIER_RESULTS = Counter('infofetch_extract_tier_results_total',
+                               'Page text extraction attempts per tier; a hit ends the search', ['tier', 'result'])
+
+
+def _policy_body(document: html.HtmlElement, main: Optional[html.HtmlElement]) -> Optional[str]:
+    bodies = document.xpath(POLICY_BODY_XPATH)
+    return container_text(bodies[0]) if bodies else None
+
+
+def _rte(document: html.HtmlElement, main: Optional[html.HtmlElement]) -> Optional[str]:
+    # Themes also use .rte in headers and footers, so stay inside <main>
+    blocks = (main if main is not None else document).xpath(RTE_XPATH)
+    return '\n'.join(container_text(block) for block in blocks) if blocks else None
+
+
+def _main(document: html.HtmlElement, main: Optional[html.HtmlElement]) -> Optional[str]:
+    if main is None:
+        return None
+    for element in main.xpath(MAIN_NOISE_XPATH):
+        element.drop_tree()
+    return container_text(main)
+
+
+# Containers Shopify themes render page bodies in, most specific first
+TEMPLATE_TIERS: List[Tuple[str, Callable[[html.HtmlElement, Optional[html.HtmlElement]], Optional[str]]]] = [
+    ('policy_body', _policy_body),
+    ('rte', _rte),
+    ('main', _main),
+]
+
+
+def _record(tier: str, start: float, text: Optional[str], min_length: int) -> bool:
+    hit = bool(text) and len(text.strip()) > min_length
+    EXTRACT_TIER_SECONDS.labels(tier).observe(time.perf_counter() - start)
+    EXTRACT_TIER_RESULTS.labels(tier, 'hit' if hit else 'miss').inc()
+    return hit
+
+
+def extract_page_text(content: bytes, fallback: Callable[[bytes], Optional[str]],
+                      min_length: int = MIN_PAGE_TEXT_LENGTH) -> Optional[str]:
+    """
+    Main text of a policy, about or contact page. The template containers
+    are tried first, from one lxml parse (timed with the first tier);
+    fallback (trafilatura) only runs when none of them holds more than
+    min_length characters.
+    """
+    start = time.perf_counter()
+    try:
+        document = html.fromstring(content)
+    except (etree.ParserError, ValueError) as e:
+        logger.debug(f"Could not parse page for template extraction: {str(e)}")
+        document = None
+
+    if document is not None:
+        mains = document.xpath(MAIN_XPATH)
+        main = mains[0] if mains else None
+        for tier, extract in TEMPLATE_TIERS:
+            text = extract(document, main)
+            if _record(tier, start, text, min_length):
+                return text
+            start = time.perf_counter()
+
+    start = time.perf_counter()
+    text = fallback(content)
+    _record('trafilatura', start, text, min_length)
+    return text
@@ -0,0 +1,156 @@
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NEGATIVE_TTL = 6 * 60 * 60
+DEFAULT_MAX_HOSTS = 10000
+
+# Limits on an imported path map
+MAX_IMPORT_CATEGORIES = 16
+MAX_IMPORT_PATH_LENGTH = 512
+CATEGORY_PATTERN = re.compile(r'[a-z][a-z0-9_]{0,63}')
+HOST_PATTERN = re.compile(r'[a-z0-9]([a-z0-9.-]{0,252})(:[0-9]{1,5})?')
+
+
+def clean_import_path(path: Any) -> str:
+    """
+    An imported learned path in stored form (no leading slash), or
+    ValueError. Only store-relative paths are accepted: nothing that would
+    make urljoin leave the store, i.e. no scheme or host, no leading //,
+    no backslashes or whitespace, and no . or .. segments.
+    """
+    if not isinstance(path, str) or not path or len(path) > MAX_IMPORT_PATH_LENGTH:
+        raise ValueError(f"Invalid path {path!r}")
+    if path.startswith('//') or '\\' in path or any(c.isspace() or ord(c) < 32 for c in path):
+        raise ValueError(f"Path {path!r} is not relative to the store")
+    parts = urlsplit(path)
+    if parts.scheme or parts.netloc:
+        raise ValueError(f"Path {path!r} is not relative to the store")
+    path = path[1:] if path.startswith('/') else path
+    if not path or any(segment in ('.', '..') for segment in parts.path.split('/')):
+        raise ValueError(f"Invalid path {path!r}")
+    return path
+
+
+class PathMemory:
+    """
+    Per-host memory of candidate paths for the path-probing scrapers.
+    Paths that returned 404/410 or too little content are skipped until their
+    TTL runs out, and the path that last succeeded for each category
+    (privacy, refund, faq, about, contact) is tried first. The number of
+    remembered hosts is bounded with LRU eviction.
+    """
+
+    def __init__(self, negative_ttl: float = DEFAULT_NEGATIVE_TTL, max_hosts: int = DEFAULT_MAX_HOSTS):
+        self.negative_ttl = negative_ttl
+        self.max_hosts = max_hosts
+        # host -> {path: expiry timestamp}
+        self._dead: 'OrderedDict[str, Dict[str, float]]' = OrderedDict()
+        # host -> {category: path}
+        self._learned: 'OrderedDict[str, Dict[str, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _host_entry(self, table: 'OrderedDict[str, Dict]', host: str) -> Dict:
+        """Get or create a host's entry in table; caller must hold the lock"""
+        entry = table.get(host)
+        if entry is None:
+            entry = table[host] = {}
+            while len(table) > self.max_hosts:
+                table.popitem(last=False)
+        else:
+            table.move_to_end(host)
+        return entry
+
+    def mark_dead(self, host: str, path: str) -> None:
+        """Remember that a path has nothing useful on this host"""
+        if self.negative_ttl <= 0:
+            return
+        with self._lock:
+            self._host_entry(self._dead, host)[path] = time.time() + self.negative_ttl
+            # A dead path can no longer be the learned one
+            learned = self._learned.get(host)
+            if learned:
+                for category in [c for c, p in learned.items() if p == path]:
+                    del learned[category]
+        logger.debug(f"Marked {host}/{path} as dead for {self.negative_ttl}s")
+
+    def mark_alive(self, host: str, path: str, category: Optional[str] = None) -> None:
+        """Record a successful path, learning it for its category"""
+        with self._lock:
+            paths = self._dead.get(host)
+            if paths:
+                paths.pop(path, None)
+            if category:
+                self._host_entry(self._learned, host)[category] = path
+
+    def candidate_paths(self, host: str, paths: List[str], category: Optional[str] = None) -> List[str]:
+        """
+        Order candidates for a probe: the learned path for the category
+        first, then the remaining live candidates in their original order
+        """
+        with self._lock:
+            learned = self._learned.get(host, {}).get(category) if category else None
+            dead = self._dead.get(host)
+            if dead:
+                now = time.time()
+                for path in [p for p, expires in dead.items() if expires <= now]:
+                    del dead[path]
+            dead = set(dead or ())
+
+        ordered = [learned] if learned else []
+        ordered.extend(path for path in paths if path != learned and path not in dead)
+        return ordered
+
+    def learned_path(self, host: str, category: str) -> Optional[str]:
+        """The path that last succeeded for this host and category"""
+        with self._lock:
+            return self._learned.get(host, {}).get(category)
+
+    def export_map(self) -> Dict[str, Dict[str, str]]:
+        """Snapshot of the learned host -> {category: path} map"""
+        with self._lock:
+            return {host: dict(categories) for host, categories in self._learned.items()}
+
+    def import_map(self, mapping: Dict[str, Dict[str, str]], overwrite: bool = True,
+                   normalize_host: Callable[[str], str] = str.lower) -> int:
+        """
+        Merge a learned map exported by another worker. Host keys are
+        normalized with normalize_host, the helper used for lookups. The
+        whole map is validated first and nothing is applied if any entry is
+        invalid (ValueError). Existing entries are kept unless overwrite is
+        set. Returns the number of entries applied.
+        """
+        if len(mapping) > self.max_hosts:
+            raise ValueError(f"Path map has {len(mapping)} hosts, at most {self.max_hosts} are accepted")
+        cleaned: Dict[str, Dict[str, str]] = {}
+        for host, categories in mapping.items():
+            normalized = normalize_host(host) if isinstance(host, str) else ''
+            if not HOST_PATTERN.fullmatch(normalized):
+                raise ValueError(f"Invalid host {host!r}")
+            if not isinstance(categories, dict):
+                raise ValueError(f"Paths of {host!r} must be an object of category: path")
+            if len(categories) > MAX_IMPORT_CATEGORIES:
+                raise ValueError(f"{host!r} has {len(categories)} categories, "
+                                 f"at most {MAX_IMPORT_CATEGORIES} are accepted")
+            entry = cleaned.setdefault(normalized, {})
+            for category, path in categories.items():
+                if not CATEGORY_PATTERN.fullmatch(category):
+                    raise ValueError(f"Invalid category {category!r} for {host!r}")
+                entry[category] = clean_import_path(path)
+
+        applied = 0
+        with self._lock:
+            for host, categories in cleaned.items():
+                entry = self._host_entry(self._learned, host)
+                for category, path in categories.items():
+                    if category in entry and not overwrite:
+                        continue
+                    entry[category] = path
+                    applied += 1
+        return applied
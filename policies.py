@@ -0,0 +1,57 @@
+import logging
+from typing import Optional
+from lxml import etree, html
+
+logger = logging.getLogger(__name__)
+
+# Canonical policy endpoints every Shopify store serves, by insights category
+SHOPIFY_POLICY_PATHS = {
+    'privacy': 'policies/privacy-policy',
+    'refund': 'policies/refund-policy',
+    'shipping': 'policies/shipping-policy',
+    'terms_of_service': 'policies/terms-of-service',
+    'contact_information': 'policies/contact-information',
+}
+
+# Shopify renders the policy text inside this container on every theme
+POLICY_BODY_XPATH = (
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' shopify-policy__body ')]"
+)
+
+BLOCK_TAGS = {
+    'p', 'div', 'li', 'ul', 'ol', 'br', 'tr', 'table', 'section', 'article',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre', 'dd', 'dt'
+}
+
+
+def extract_policy_body(content: bytes) -> Optional[str]:
+    """
+    Extract the text of a Shopify policy page straight from its
+    .shopify-policy__body container, one line per block element.
+    Returns None when the page has no policy container.
+    """
+    try:
+        document = html.fromstring(content)
+    except (etree.ParserError, ValueError) as e:
+        logger.debug(f"Could not parse policy page: {str(e)}")
+        return None
+
+    bodies = document.xpath(POLICY_BODY_XPATH)
+    if not bodies:
+        return None
+    return container_text(bodies[0])
+
+
+def container_text(element: html.HtmlElement) -> str:
+    """
+    Text of a content container, one line per block element, without
+    scripts and styles. Removes those from the element's tree.
+    """
+    for child in element.xpath('.//script | .//style | .//noscript'):
+        child.drop_tree()
+    # Terminate block elements with a newline so paragraphs stay separate
+    for child in element.iter(*BLOCK_TAGS):
+        child.tail = '\n' + (child.tail or '')
+
+    lines = (' '.join(line.split()) for line in element.text_content().splitlines())
+    return '\n'.join(line for line in lines if line)
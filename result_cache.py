@@ -0,0 +1,145 @@
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Optional
+from urllib.parse import urlparse
+from scraper import ALL_SECTIONS, normalize_store_url, store_host
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULT_TTL = 300
+DEFAULT_RESULT_CACHE_BYTES = 128 * 1024 * 1024
+
+
+def result_cache_key(website_url: str, sections: FrozenSet[str] = ALL_SECTIONS) -> str:
+    """
+    Normalised store URL: scheme, case, www. and trailing slashes are ignored.
+    Scrapes limited to some sections are cached under their own key.
+    """
+    path = urlparse(normalize_store_url(website_url)).path.rstrip('/')
+    key = store_host(website_url) + path
+    if sections != ALL_SECTIONS:
+        key += '#' + ','.join(sorted(sections))
+    return key
+
+
+@dataclass
+class CachedResult:
+    """A value served by ResultCache and how it was obtained"""
+    value: Any
+    status: str  # HIT, MISS or COALESCED
+    age: float = 0.0
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'stored_at')
+
+    def __init__(self, value: Any, size: int):
+        self.value = value
+        self.size = size
+        self.stored_at = time.monotonic()
+
+
+class _Flight:
+    """An in-progress computation that concurrent callers wait on"""
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    """
+    TTL cache for scrape results with an approximate memory bound and LRU
+    eviction. Concurrent misses for the same key are coalesced so only one
+    computation runs while the other callers wait for its result.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_RESULT_TTL, max_bytes: int = DEFAULT_RESULT_CACHE_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._counts = {'hits': 0, 'misses': 0, 'coalesced': 0}
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._counts, entries=len(self._entries), bytes=self._size)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any],
+                       max_age: Optional[float] = None) -> CachedResult:
+        """
+        Return the cached value for key, or run compute() once for all
+        concurrent callers. max_age further limits the acceptable age of a
+        cached value; 0 forces a refresh. None results are never cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry.stored_at
+                if age <= self.ttl and (max_age is None or age <= max_age):
+                    self._entries.move_to_end(key)
+                    self._counts['hits'] += 1
+                    return CachedResult(entry.value, 'HIT', age)
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._counts['misses'] += 1
+            else:
+                self._counts['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return CachedResult(flight.value, 'COALESCED')
+
+        try:
+            flight.value = compute()
+            if flight.value is not None and self.ttl > 0:
+                self._store(key, flight.value)
+            return CachedResult(flight.value, 'MISS')
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry.size
+
+    def _store(self, key: str, value: Any) -> None:
+        # Serialised size is a cheap, stable proxy for the memory a result holds
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            logger.debug(f"Result for {key} too large to cache ({size} bytes)")
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.size
+            self._entries[key] = _Entry(value, size)
+            self._size += size
+
+            now = time.monotonic()
+            # Drop expired entries first, then least recently used ones
+            for stale_key in [k for k, e in self._entries.items() if now - e.stored_at > self.ttl]:
+                self._size -= self._entries.pop(stale_key).size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
@@ -0,0 +1,137 @@
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+from metrics import Counter, Gauge, Histogram
+
+T = TypeVar('T')
+
+SCRAPE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0)
+
+# Process-wide scrape metrics; the engine label is 'sync' or 'async'
+SCRAPE_SECONDS = Histogram('infofetch_scrape_duration_seconds', 'Wall time of scrape_store calls',
+                           ['engine'], buckets=SCRAPE_BUCKETS)
+STAGE_SECONDS = Histogram('infofetch_scrape_stage_duration_seconds', 'Wall time of each scrape stage',
+                          ['engine', 'stage'], buckets=SCRAPE_BUCKETS)
+SCRAPES_IN_FLIGHT = Gauge('infofetch_scrapes_in_flight', 'scrape_store calls currently running', ['engine'])
+UPSTREAM_RESPONSES = Counter('infofetch_upstream_responses_total',
+                             'Responses received from stores, by status class', ['engine', 'status_class'])
+UPSTREAM_TIMEOUTS = Counter('infofetch_upstream_timeouts_total', 'Requests to stores that timed out', ['engine'])
+
+
+class StageTrace:
+    """Wall time and HTTP accounting of one scrape stage"""
+    __slots__ = ('wall_ms', 'requests', 'bytes', 'cache_hits', 'winning_path')
+
+    def __init__(self):
+        self.wall_ms = 0.0
+        self.requests = 0
+        self.bytes = 0
+        self.cache_hits = 0
+        self.winning_path: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'wall_ms': round(self.wall_ms, 2),
+            'requests': self.requests,
+            'bytes': self.bytes,
+            'cache_hits': self.cache_hits,
+            'winning_path': self.winning_path,
+        }
+
+
+# The stage the current thread or task is working for. Work handed to other
+# threads must run in a copy of the submitting context to stay attributed.
+_current_stage: ContextVar[Optional['_ActiveStage']] = ContextVar('scrape_stage', default=None)
+
+
+class _ActiveStage:
+    __slots__ = ('trace', 'stage')
+
+    def __init__(self, trace: 'ScrapeTrace', stage: StageTrace):
+        self.trace = trace
+        self.stage = stage
+
+
+class ScrapeTrace:
+    """
+    Per-stage timings of one scrape_store call. Stages run under stage() or
+    run_async(), and every HTTP request made while a stage is current is
+    counted against it through record_request().
+    """
+
+    def __init__(self, website_url: str, engine: str = 'sync'):
+        self.website_url = website_url
+        self.engine = engine
+        self.stages: Dict[str, StageTrace] = {}
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _stage(self, name: str) -> StageTrace:
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = StageTrace()
+            return stage
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageTrace]:
+        stage = self._stage(name)
+        token = _current_stage.set(_ActiveStage(self, stage))
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                stage.wall_ms += elapsed
+            _current_stage.reset(token)
+
+    def run(self, name: str, func: Callable[[], T]) -> T:
+        with self.stage(name):
+            return func()
+
+    async def run_async(self, name: str, awaitable: Awaitable[T]) -> T:
+        with self.stage(name):
+            return await awaitable
+
+    def add(self, stage: StageTrace, requests: int = 0, size: int = 0,
+            cache_hits: int = 0, winning_path: Optional[str] = None) -> None:
+        with self._lock:
+            stage.requests += requests
+            stage.bytes += size
+            stage.cache_hits += cache_hits
+            if winning_path is not None:
+                stage.winning_path = winning_path
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {name: stage.as_dict() for name, stage in self.stages.items()}
+        return {
+            'total_ms': round((time.perf_counter() - self._started) * 1000, 2),
+            'requests': sum(stage['requests'] for stage in stages.values()),
+            'bytes': sum(stage['bytes'] for stage in stages.values()),
+            'cache_hits': sum(stage['cache_hits'] for stage in stages.values()),
+            'stages': stages,
+        }
+
+    def observe(self, timings: Dict[str, Any]) -> None:
+        """Feed finished timings (from as_dict) into the scrape latency histograms"""
+        SCRAPE_SECONDS.labels(self.engine).observe(timings['total_ms'] / 1000)
+        for name, stage in timings['stages'].items():
+            STAGE_SECONDS.labels(self.engine, name).observe(stage['wall_ms'] / 1000)
+
+
+def record_request(size: int, from_cache: bool = False) -> None:
+    """Count one HTTP request against the current stage, if any"""
+    active = _current_stage.get()
+    if active is not None:
+        active.trace.add(active.stage, requests=1, size=size, cache_hits=int(from_cache))
+
+
+def record_winning_path(path: str) -> None:
+    """Remember the candidate path that produced the current stage's result"""
+    active = _current_stage.get()
+    if active is not None:
+        active.trace.add(active.stage, winning_path=path)
@@ -2,69 +2,393 @@ import requests
 import json
 import re
 import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional, Any
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Any, Callable, Iterator, Tuple, Union
+from requests.adapters import HTTPAdapter
 import trafilatura
+from http_cache import HTTPCache, CachingHTTPAdapter
+from path_memory import PathMemory
+from sitemap import SitemapCache, SitemapParser, PageCandidates
+from policies import SHOPIFY_POLICY_PATHS, extract_policy_body
+from page_text import MIN_PAGE_TEXT_LENGTH, extract_page_text
+from social import extract_social_handles
+from link_keywords import DEFAULT_LINK_KEYWORDS, KeywordIndex
+from extraction import ExtractionPool
+from host_limiter import HostLimiter, RateLimitedAdapter
+from homepage import HomepageIndex, build_homepage_index
+from html_parsers import DEFAULT_PARSER_BACKEND, check_parser_backend, element_text, make_soup, parse_document
+from scrape_trace import (
+    SCRAPES_IN_FLIGHT, UPSTREAM_RESPONSES, UPSTREAM_TIMEOUTS, ScrapeTrace, record_request, record_winning_path
+)
+from metrics import Gauge, status_class
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_WORKERS = 8
+
+# Receives (section name, value) as each part of the insights becomes ready
+SectionCallback = Callable[[str, Any], None]
+
+# Sections of the insights, in output order; website_url is always returned
+INSIGHT_SECTIONS = (
+    'store_name', 'website_url', 'products', 'hero_products', 'privacy_policy', 'return_policy',
+    'shipping_policy', 'terms_of_service', 'contact_information', 'faqs', 'social_handles',
+    'contact_details', 'brand_context', 'important_links',
+)
+ALL_SECTIONS = frozenset(INSIGHT_SECTIONS)
+# Sections read from the homepage index
+HOMEPAGE_SECTIONS = frozenset(['store_name', 'hero_products', 'social_handles', 'contact_details', 'important_links'])
+# Sections that probe candidate pages, which sitemap discovery can point at
+DISCOVERY_SECTIONS = frozenset(['privacy_policy', 'return_policy', 'faqs', 'contact_details', 'brand_context'])
+DEFAULT_MAX_PROBE_WORKERS = 16
+
+# Shopify serves at most 250 products per /products.json page
+PRODUCTS_PAGE_LIMIT = 250
+DEFAULT_MAX_PRODUCT_PAGES = 40
+DEFAULT_MAX_PRODUCTS = 10000
+DEFAULT_PRODUCT_PAGE_CONCURRENCY = 4
+
+# XPath versions of the FAQ selectors for the lxml.html parser backend
+_LOWER_CLASS = "translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+FAQ_SECTIONS_XPATH = (
+    f"//*[(self::div or self::section) and (contains({_LOWER_CLASS}, 'faq') or "
+    f"contains({_LOWER_CLASS}, 'question') or contains({_LOWER_CLASS}, 'accordion'))]"
+)
+FAQ_QUESTIONS_XPATH = './/*[self::h1 or self::h2 or self::h3 or self::h4 or self::h5 or self::h6 or self::dt]'
+
+# Saturation of the stage and probe worker pools
+POOL_MAX_WORKERS = Gauge('infofetch_pool_max_workers', 'Configured workers per scraper pool', ['pool'])
+POOL_BUSY_WORKERS = Gauge('infofetch_pool_busy_workers', 'Workers currently running a task', ['pool'])
+POOL_QUEUED_TASKS = Gauge('infofetch_pool_queued_tasks', 'Tasks waiting for a free worker', ['pool'])
+
+def normalize_store_url(website_url: str) -> str:
+    """Add a scheme to bare store URLs the same way scrape_store does"""
+    website_url = website_url.strip()
+    if not website_url.startswith(('http://', 'https://')):
+        website_url = 'https://' + website_url
+    return website_url
+
+def parse_fields(fields: Union[None, str, Iterable[str]]) -> FrozenSet[str]:
+    """
+    Sections requested by a fields parameter: a list or a comma-separated
+    string. Empty means every section. Raises ValueError for unknown names.
+    """
+    if fields is None:
+        return ALL_SECTIONS
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    elif not isinstance(fields, (list, tuple, set, frozenset)):
+        raise ValueError("fields must be a list or a comma-separated string")
+    requested = frozenset(str(field).strip() for field in fields) - {''}
+    unknown = requested - ALL_SECTIONS
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return (requested | {'website_url'}) if requested else ALL_SECTIONS
+
+def store_host(website_url: str) -> str:
+    """Canonical host key for a store, used to key per-store state"""
+    host = urlparse(normalize_store_url(website_url)).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+class ProductPageError(Exception):
+    """A /products.json page after the first could not be fetched, so the walk is incomplete"""
+
+class MeteredSession(requests.Session):
+    """Session that counts upstream responses by status class, and timeouts"""
+    
+    def send(self, request, **kwargs):
+        try:
+            response = super().send(request, **kwargs)
+        except requests.Timeout:
+            UPSTREAM_TIMEOUTS.labels('sync').inc()
+            raise
+        # Revalidated cache hits were a 304 on the wire
+        status = 304 if getattr(response, 'from_cache', False) else response.status_code
+        UPSTREAM_RESPONSES.labels('sync', status_class(status)).inc()
+        return response
+
 class ShopifyStoreScraper:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, concurrent: bool = False, max_workers: int = DEFAULT_MAX_WORKERS,
+                 race_paths: bool = False, max_probe_workers: int = DEFAULT_MAX_PROBE_WORKERS,
+                 max_product_pages: int = DEFAULT_MAX_PRODUCT_PAGES,
+                 max_products: int = DEFAULT_MAX_PRODUCTS,
+                 product_page_concurrency: int = DEFAULT_PRODUCT_PAGE_CONCURRENCY,
+                 http_cache: Optional[HTTPCache] = None,
+                 path_memory: Optional[PathMemory] = None,
+                 sitemap_cache: Optional[SitemapCache] = None,
+                 parser_backend: str = DEFAULT_PARSER_BACKEND,
+                 link_keywords: Optional[Mapping[str, Iterable[str]]] = None,
+                 extraction_pool: Optional[ExtractionPool] = None,
+                 host_limiter: Optional[HostLimiter] = None):
+        self.session = MeteredSession()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         self.timeout = 10
+        
+        # Concurrent mode runs the independent sub-scrapers on a bounded pool
+        # that shares this session, so size the connection pool to match
+        self.concurrent = concurrent
+        self.max_workers = max(1, max_workers)
+        
+        # Race mode requests all candidate paths of a page at once on a
+        # separate probe pool, so stages never wait on their own sub-tasks.
+        # Product pages are fetched on the same probe pool.
+        self.race_paths = race_paths
+        self.max_probe_workers = max(1, max_probe_workers)
+        
+        # Caps that keep huge catalogs from exhausting worker memory
+        self.max_product_pages = max(1, max_product_pages)
+        self.max_products = max(1, max_products)
+        self.product_page_concurrency = max(1, product_page_concurrency)
+        
+        # Optional conditional-request cache shared by every fetch
+        self.http_cache = http_cache
+        # Optional per-host memory of dead candidate paths
+        self.path_memory = path_memory
+        # Sitemap discovery is enabled by giving the scraper a cache for it
+        self.sitemap_cache = sitemap_cache
+        # HTML parser for the homepage and FAQ pages: 'html.parser' or
+        # 'lxml' through BeautifulSoup, or 'lxml.html' with XPath extractors
+        self.parser_backend = check_parser_backend(parser_backend)
+        # Keyword table of the important link categories
+        self.set_link_keywords(DEFAULT_LINK_KEYWORDS if link_keywords is None else link_keywords)
+        # Optional process pool that runs trafilatura off this process's GIL
+        self.extraction_pool = extraction_pool
+        if extraction_pool is not None:
+            POOL_MAX_WORKERS.labels('extract').set(extraction_pool.max_workers)
+        # Optional process-wide per-host rate limit and in-flight cap
+        self.host_limiter = host_limiter
+        
+        pool_size = self.max_workers + self.max_probe_workers
+        if http_cache is not None:
+            adapter = CachingHTTPAdapter(http_cache, pool_connections=pool_size, pool_maxsize=pool_size)
+        else:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        if host_limiter is not None:
+            adapter = RateLimitedAdapter(adapter, host_limiter)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Count every response against the scrape stage that requested it
+        self.session.hooks['response'].append(self._count_response)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._probe_executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
     
-    def scrape_store(self, website_url: str) -> Optional[Dict[str, Any]]:
+    def set_link_keywords(self, table: Mapping[str, Iterable[str]]) -> None:
+        """
+        Replace the important link keyword table: categories in priority
+        order, each with its keywords. Scrapes in progress keep the old one.
         """
-        Main method to scrape a Shopify store and return structured insights
+        self.link_index = KeywordIndex(table)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Lazily create the worker pool shared by all concurrent scrapes"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='scraper'
+                    )
+                    POOL_MAX_WORKERS.labels('stage').set(self.max_workers)
+        return self._executor
+    
+    def _get_probe_executor(self) -> ThreadPoolExecutor:
+        """Lazily create the pool used to race candidate paths"""
+        if self._probe_executor is None:
+            with self._executor_lock:
+                if self._probe_executor is None:
+                    self._probe_executor = ThreadPoolExecutor(
+                        max_workers=self.max_probe_workers,
+                        thread_name_prefix='scraper-probe'
+                    )
+                    POOL_MAX_WORKERS.labels('probe').set(self.max_probe_workers)
+        return self._probe_executor
+    
+    def _submit(self, executor: ThreadPoolExecutor, fn: Callable[..., Any], *args, **kwargs):
         """
+        Submit to a pool in a copy of the caller's context, keeping stage
+        attribution, and track the task in the pool saturation gauges
+        """
+        pool = 'probe' if executor is self._probe_executor else 'stage'
+        queued, busy = POOL_QUEUED_TASKS.labels(pool), POOL_BUSY_WORKERS.labels(pool)
+        
+        def run():
+            queued.dec()
+            busy.inc()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                busy.dec()
+        
+        def dequeue_cancelled(future):
+            # Cancelled tasks never start, so they leave the queue here
+            if future.cancelled():
+                queued.dec()
+        
+        queued.inc()
+        future = executor.submit(contextvars.copy_context().run, run)
+        future.add_done_callback(dequeue_cancelled)
+        return future
+    
+    @staticmethod
+    def _count_response(response: requests.Response, *args, **kwargs) -> None:
+        """Session hook recording each response for the current scrape stage"""
+        # Streamed bodies are counted by their reader once consumed
+        if kwargs.get('stream'):
+            return
+        from_cache = getattr(response, 'from_cache', False)
+        record_request(0 if from_cache else len(response.content), from_cache)
+    
+    @staticmethod
+    def _run_stage(trace: ScrapeTrace, name: str, stage: Callable[[], Any],
+                   on_section: Optional[SectionCallback]) -> Any:
+        """Run one stage and report its section as soon as it is done"""
+        value = trace.run(name, stage)
+        if on_section is not None:
+            on_section(name, value)
+        return value
+    
+    def _run_stages(self, stages: List[Tuple[str, Callable[[], Any]]], trace: ScrapeTrace,
+                    on_section: Optional[SectionCallback] = None,
+                    wait: Optional[Callable[[], Any]] = None,
+                    waiting: FrozenSet[str] = frozenset()) -> Dict[str, Any]:
+        """
+        Run sub-scraper stages sequentially or on the worker pool. The stages
+        named in waiting only start once wait() has returned; the others
+        start first, so their sections are not held up by it.
+        """
+        first = [(name, stage) for name, stage in stages if name not in waiting]
+        then = [(name, stage) for name, stage in stages if name in waiting]
+        
+        if not self.concurrent:
+            results = {name: self._run_stage(trace, name, stage, on_section) for name, stage in first}
+            if then and wait is not None:
+                wait()
+            results.update((name, self._run_stage(trace, name, stage, on_section)) for name, stage in then)
+            return {name: results[name] for name, _ in stages}
+        
+        executor = self._get_executor()
+        futures = {name: self._submit(executor, self._run_stage, trace, name, stage, on_section)
+                   for name, stage in first}
+        if then and wait is not None:
+            wait()
+        futures.update((name, self._submit(executor, self._run_stage, trace, name, stage, on_section))
+                       for name, stage in then)
+        # Collect in declaration order so results match the sequential path
+        return {name: futures[name].result() for name, _ in stages}
+    
+    def scrape_store(self, website_url: str, include_timings: bool = False,
+                     on_section: Optional[SectionCallback] = None,
+                     fields: Union[None, str, Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Main method to scrape a Shopify store and return structured insights.
+        Per-stage timings are always logged, and added to the insights under
+        '_timings' when include_timings is set. on_section is called with
+        each section of the insights as soon as it is ready, from the thread
+        that produced it. fields limits the scrape to those sections (see
+        parse_fields); pages only other sections need are never fetched.
+        """
+        sections = parse_fields(fields)
+        website_url = normalize_store_url(website_url)
+        trace = ScrapeTrace(website_url, 'sync')
+        in_flight = SCRAPES_IN_FLIGHT.labels('sync')
+        in_flight.inc()
         try:
-            # Normalize URL
-            if not website_url.startswith(('http://', 'https://')):
-                website_url = 'https://' + website_url
+            insights = self._scrape_store(website_url, trace, on_section, sections)
+        finally:
+            in_flight.dec()
+            timings = self._report_timings(trace)
+        
+        if include_timings and insights is not None:
+            insights['_timings'] = timings
+        return insights
+    
+    @staticmethod
+    def _report_timings(trace: ScrapeTrace) -> Dict[str, Any]:
+        """Emit a scrape's timings as one structured log line and into the latency metrics"""
+        timings = trace.as_dict()
+        logger.info(json.dumps({'event': 'scrape_timings', 'website_url': trace.website_url, **timings}))
+        trace.observe(timings)
+        return timings
+    
+    def _scrape_store(self, website_url: str, trace: ScrapeTrace,
+                      on_section: Optional[SectionCallback] = None,
+                      sections: FrozenSet[str] = ALL_SECTIONS) -> Optional[Dict[str, Any]]:
+        """scrape_store body, with each step running as a stage of trace"""
+        try:
+            needs_homepage, needs_discovery = self._plan(sections)
             
-            # Test if website is accessible
-            response = self.session.get(website_url, timeout=self.timeout)
-            if response.status_code != 200:
-                logger.error(f"Website not accessible: {website_url} (Status: {response.status_code})")
-                return None
+            # In concurrent mode sitemap discovery overlaps the homepage fetch
+            discovery = None
+            if self.concurrent and needs_discovery:
+                discovery = self._submit(self._get_probe_executor(), trace.run, 'sitemap_discovery',
+                                         lambda: self._discover_pages(website_url))
             
-            # Check if it's a Shopify store
-            soup = BeautifulSoup(response.content, 'html.parser')
-            if not self._is_shopify_store(soup, response.text):
-                logger.warning(f"Website may not be a Shopify store: {website_url}")
+            first_products = None
+            if needs_homepage:
+                # Test if website is accessible
+                with trace.stage('homepage'):
+                    response = self.session.get(website_url, timeout=self.timeout)
+                if response.status_code != 200:
+                    logger.error(f"Website not accessible: {website_url} (Status: {response.status_code})")
+                    return None
+            else:
+                # Without the homepage, the first catalog page is the accessibility check
+                with trace.stage('products'):
+                    first_products = self._fetch_product_page(website_url, 1)
+                if first_products is None:
+                    logger.error(f"Product catalog not accessible: {website_url}")
+                    return None
             
-            # Extract store name
-            store_name = self._extract_store_name(soup, website_url)
+            page = store_name = None
+            if needs_homepage:
+                # Walk the homepage once; every homepage extractor reads the index
+                with trace.stage('parse_homepage'):
+                    page = self._index_homepage(response.content)
+                
+                # Check if it's a Shopify store
+                if not self._is_shopify_store(page, response.text):
+                    logger.warning(f"Website may not be a Shopify store: {website_url}")
+                
+                # Extract store name
+                store_name = self._extract_store_name(page, website_url)
             
-            # Initialize insights structure
-            insights = {
-                "store_name": store_name,
-                "website_url": website_url,
-                "products": [],
-                "hero_products": [],
-                "privacy_policy": "",
-                "return_policy": "",
-                "faqs": [],
-                "social_handles": {},
-                "contact_details": {},
-                "brand_context": "",
-                "important_links": []
-            }
+            # Initialize insights structure with the requested sections only
+            insights = {name: value for name, value in self._new_insights(store_name, website_url).items()
+                        if name in sections}
+            self._report_store(insights, on_section)
+            
+            # Discovered pages must be known before the path-probing stages
+            # run; the homepage and catalog sections do not wait for them
+            if discovery is not None:
+                wait_for_discovery = discovery.result
+            else:
+                wait_for_discovery = partial(trace.run, 'sitemap_discovery', lambda: self._discover_pages(website_url))
             
             # Scrape different components
-            insights["products"] = self._scrape_products(website_url)
-            insights["hero_products"] = self._scrape_hero_products(soup, website_url)
-            insights["privacy_policy"] = self._scrape_privacy_policy(website_url)
-            insights["return_policy"] = self._scrape_return_policy(website_url)
-            insights["faqs"] = self._scrape_faqs(website_url)
-            insights["social_handles"] = self._extract_social_handles(soup)
-            insights["contact_details"] = self._extract_contact_details(soup, website_url)
-            insights["brand_context"] = self._scrape_brand_context(website_url)
-            insights["important_links"] = self._extract_important_links(soup, website_url)
+            stages = [
+                ("products", lambda: self._scrape_products(website_url, first_products)),
+                ("hero_products", lambda: self._scrape_hero_products(page, website_url)),
+                ("privacy_policy", lambda: self._scrape_privacy_policy(website_url)),
+                ("return_policy", lambda: self._scrape_return_policy(website_url)),
+                ("shipping_policy", lambda: self._scrape_shopify_policy(website_url, 'shipping')),
+                ("terms_of_service", lambda: self._scrape_shopify_policy(website_url, 'terms_of_service')),
+                ("contact_information", lambda: self._scrape_shopify_policy(website_url, 'contact_information')),
+                ("faqs", lambda: self._scrape_faqs(website_url)),
+                ("social_handles", lambda: self._extract_social_handles(page)),
+                ("contact_details", lambda: self._extract_contact_details(page, website_url)),
+                ("brand_context", lambda: self._scrape_brand_context(website_url)),
+                ("important_links", lambda: self._extract_important_links(page, website_url)),
+            ]
+            stages = [(name, stage) for name, stage in stages if name in sections]
+            waiting = DISCOVERY_SECTIONS if needs_discovery else frozenset()
+            insights.update(self._run_stages(stages, trace, on_section, wait_for_discovery, waiting))
             
             return insights
             
@@ -75,7 +399,49 @@ class ShopifyStoreScraper:
             logger.error(f"Unexpected error while scraping {website_url}: {str(e)}")
             raise
     
-    def _is_shopify_store(self, soup: BeautifulSoup, html_content: str) -> bool:
+    def _plan(self, sections: FrozenSet[str]) -> Tuple[bool, bool]:
+        """
+        Whether a scrape of these sections needs the homepage and sitemap
+        discovery. The homepage doubles as the accessibility check, so it is
+        only skipped when the product catalog can take that role.
+        """
+        needs_homepage = bool(sections & HOMEPAGE_SECTIONS) or 'products' not in sections
+        needs_discovery = self.sitemap_cache is not None and bool(sections & DISCOVERY_SECTIONS)
+        return needs_homepage, needs_discovery
+    
+    @staticmethod
+    def _report_store(insights: Dict[str, Any], on_section: Optional[SectionCallback]) -> None:
+        """Report the sections known before any stage runs"""
+        if on_section is not None:
+            for name in ('store_name', 'website_url'):
+                if name in insights:
+                    on_section(name, insights[name])
+    
+    @staticmethod
+    def _new_insights(store_name: Optional[str], website_url: str) -> Dict[str, Any]:
+        """Create the empty insights structure returned by scrape_store"""
+        return {
+            "store_name": store_name,
+            "website_url": website_url,
+            "products": [],
+            "hero_products": [],
+            "privacy_policy": "",
+            "return_policy": "",
+            "shipping_policy": "",
+            "terms_of_service": "",
+            "contact_information": "",
+            "faqs": [],
+            "social_handles": {},
+            "contact_details": {},
+            "brand_context": "",
+            "important_links": []
+        }
+    
+    def _index_homepage(self, content: bytes) -> HomepageIndex:
+        """Parse the homepage and index it in a single pass"""
+        return build_homepage_index(content, self.parser_backend)
+    
+    def _is_shopify_store(self, page: HomepageIndex, html_content: str) -> bool:
         """Check if the website is a Shopify store"""
         shopify_indicators = [
             'Shopify.theme',
@@ -89,32 +455,30 @@ class ShopifyStoreScraper:
                 return True
         
         # Check for Shopify-specific meta tags
-        shopify_meta = soup.find('meta', attrs={'name': 'shopify-checkout-api-token'})
-        if shopify_meta:
+        if page.has_meta(name='shopify-checkout-api-token'):
             return True
             
         return False
     
-    def _extract_store_name(self, soup: BeautifulSoup, website_url: str) -> str:
+    def _extract_store_name(self, page: HomepageIndex, website_url: str) -> str:
         """Extract store name from various sources"""
         # Try title tag
-        title_tag = soup.find('title')
-        if title_tag:
-            title = title_tag.get_text().strip()
+        if page.title_text is not None:
+            title = page.title_text.strip()
             # Remove common suffixes
             title = re.sub(r'\s*[-–|]\s*(Shop|Store|Online|eCommerce).*$', '', title, flags=re.IGNORECASE)
             if title:
                 return title
         
         # Try site name meta tag
-        site_name = soup.find('meta', property='og:site_name')
-        if site_name and site_name.get('content'):
-            return site_name['content'].strip()
+        site_name = page.meta_content(property='og:site_name')
+        if site_name:
+            return site_name.strip()
         
         # Try header logo alt text
-        logo = soup.find('img', alt=True)
-        if logo and logo.get('alt'):
-            alt_text = logo['alt'].strip()
+        logo_alt = page.first_image_alt()
+        if logo_alt:
+            alt_text = logo_alt.strip()
             if alt_text and not alt_text.lower() in ['logo', 'image']:
                 return alt_text
         
@@ -122,38 +486,124 @@ class ShopifyStoreScraper:
         domain = urlparse(website_url).netloc
         return domain.replace('www.', '').replace('.com', '').replace('.myshopify.com', '').title()
     
-    def _scrape_products(self, website_url: str) -> List[Dict[str, Any]]:
-        """Scrape product catalog from /products.json"""
+    def _scrape_products(self, website_url: str,
+                         first_page: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Scrape product catalog from all pages of /products.json.
+        first_page is page 1 when the caller has already fetched it.
+        """
+        products = []
+        
         try:
-            products_url = urljoin(website_url, '/products.json')
-            response = self.session.get(products_url, timeout=self.timeout)
-            
-            if response.status_code == 200:
-                data = response.json()
-                products = []
-                
-                for product in data.get('products', []):
-                    product_info = {
-                        'id': product.get('id'),
-                        'title': product.get('title'),
-                        'handle': product.get('handle'),
-                        'vendor': product.get('vendor'),
-                        'product_type': product.get('product_type'),
-                        'tags': product.get('tags', '').split(',') if product.get('tags') else [],
-                        'price_range': self._extract_price_range(product.get('variants', [])),
-                        'available': any(variant.get('available', False) for variant in product.get('variants', [])),
-                        'images': [img.get('src') for img in product.get('images', [])],
-                        'url': urljoin(website_url, f"/products/{product.get('handle')}")
-                    }
-                    products.append(product_info)
-                
-                logger.info(f"Found {len(products)} products")
-                return products
+            # Normalise each page as it arrives so raw pages can be dropped
+            for page_products in self._iter_product_pages(website_url, first_page):
+                remaining = self.max_products - len(products)
+                products.extend(self._parse_products(page_products[:remaining], website_url))
+                if len(products) >= self.max_products:
+                    logger.warning(f"Product cap of {self.max_products} reached for {website_url}")
+                    break
             
         except Exception as e:
             logger.error(f"Error scraping products: {str(e)}")
         
-        return []
+        logger.info(f"Found {len(products)} products")
+        return products
+    
+    def _fetch_product_page(self, website_url: str, page: int) -> Optional[List[Dict[str, Any]]]:
+        """Fetch one page of /products.json, or None if the endpoint is unavailable"""
+        products_url = urljoin(website_url, '/products.json')
+        response = self.session.get(
+            products_url,
+            params={'limit': PRODUCTS_PAGE_LIMIT, 'page': page},
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            return None
+        return response.json().get('products', [])
+    
+    def _product_page_windows(self) -> Iterator[List[int]]:
+        """
+        Yield batches of page numbers to fetch together. The first page is
+        fetched alone so small catalogs cost a single request.
+        """
+        yield [1]
+        page = 2
+        while page <= self.max_product_pages:
+            last = min(page + self.product_page_concurrency, self.max_product_pages + 1)
+            yield list(range(page, last))
+            page = last
+    
+    def _iter_product_pages(self, website_url: str,
+                            first_page: Optional[List[Dict[str, Any]]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield raw product lists page by page, in order, until the catalog is
+        exhausted or the page cap is reached. Pages inside a window are
+        fetched concurrently on the probe pool. Raises ProductPageError when
+        a later page fails, so a failed fetch never looks like the end of
+        the catalog.
+        """
+        windows = self._product_page_windows()
+        if first_page is not None:
+            # Page 1 was already fetched by the caller
+            next(windows)
+            if not first_page:
+                return
+            yield first_page
+            if len(first_page) < PRODUCTS_PAGE_LIMIT:
+                return
+        
+        for window in windows:
+            fetches = None
+            if len(window) > 1:
+                executor = self._get_probe_executor()
+                fetches = [self._submit(executor, self._fetch_product_page, website_url, page) for page in window]
+            
+            try:
+                for index, page in enumerate(window):
+                    if fetches:
+                        page_products = fetches[index].result()
+                    else:
+                        page_products = self._fetch_product_page(website_url, page)
+                    
+                    if page_products is None and page > 1:
+                        # Only page 1 tells an unavailable catalog apart
+                        raise ProductPageError(f"/products.json page {page} unavailable for {website_url}")
+                    if not page_products:
+                        return
+                    yield page_products
+                    if len(page_products) < PRODUCTS_PAGE_LIMIT:
+                        return
+            finally:
+                if fetches:
+                    for fetch in fetches:
+                        fetch.cancel()
+        
+        logger.warning(f"Product page cap of {self.max_product_pages} reached for {website_url}")
+    
+    def _parse_products(self, raw_products: List[Dict[str, Any]], website_url: str) -> List[Dict[str, Any]]:
+        """Normalise raw /products.json entries into product summaries"""
+        products = []
+        
+        for product in raw_products:
+            # /products.json serves tags as a list; older exports as a comma-separated string
+            tags = product.get('tags') or []
+            if isinstance(tags, str):
+                tags = tags.split(',')
+            product_info = {
+                'id': product.get('id'),
+                'title': product.get('title'),
+                'handle': product.get('handle'),
+                'vendor': product.get('vendor'),
+                'product_type': product.get('product_type'),
+                'tags': tags,
+                'price_range': self._extract_price_range(product.get('variants', [])),
+                'available': any(variant.get('available', False) for variant in product.get('variants', [])),
+                'images': [img.get('src') for img in product.get('images', [])],
+                'url': urljoin(website_url, f"/products/{product.get('handle')}")
+            }
+            products.append(product_info)
+        
+        return products
     
     def _extract_price_range(self, variants: List[Dict]) -> Dict[str, float]:
         """Extract price range from product variants"""
@@ -168,17 +618,17 @@ class ShopifyStoreScraper:
             }
         return {}
     
-    def _scrape_hero_products(self, soup: BeautifulSoup, website_url: str) -> List[Dict[str, Any]]:
+    def _scrape_hero_products(self, page: HomepageIndex, website_url: str) -> List[Dict[str, Any]]:
         """Scrape featured/hero products from homepage"""
         hero_products = []
         
         try:
             # Look for product links on homepage
-            product_links = soup.find_all('a', href=re.compile(r'/products/'))
+            product_links = page.product_anchors()
             
             seen_products = set()
-            for link in product_links[:6]:  # Limit to first 6 featured products
-                href = link.get('href')
+            for anchor in product_links[:6]:  # Limit to first 6 featured products
+                href = anchor.href
                 if href and href not in seen_products:
                     seen_products.add(href)
                     
@@ -191,19 +641,19 @@ class ShopifyStoreScraper:
                     }
                     
                     # Try to get title from link text or nearby elements
-                    title_text = link.get_text().strip()
+                    title_text = anchor.text.strip()
                     if title_text:
                         product_info['title'] = title_text
                     
                     # Look for product images
-                    img = link.find('img')
-                    if img and img.get('src'):
-                        product_info['image'] = img['src']
+                    image = page.anchor_image(anchor)
+                    if image:
+                        product_info['image'] = image
                     
                     # Look for price in nearby elements
-                    price_elem = link.find(class_=re.compile(r'price', re.I))
-                    if price_elem:
-                        product_info['price'] = price_elem.get_text().strip()
+                    price = page.anchor_price(anchor)
+                    if price is not None:
+                        product_info['price'] = price.strip()
                     
                     if product_info['title'] or product_info['image']:
                         hero_products.append(product_info)
@@ -217,116 +667,278 @@ class ShopifyStoreScraper:
     
     def _scrape_privacy_policy(self, website_url: str) -> str:
         """Scrape privacy policy content"""
-        return self._scrape_policy_page(website_url, ['privacy', 'privacy-policy', 'policies/privacy-policy'])
+        return (self._scrape_shopify_policy(website_url, 'privacy') or
+                self._scrape_policy_page(website_url, ['privacy', 'privacy-policy'], 'privacy'))
     
     def _scrape_return_policy(self, website_url: str) -> str:
         """Scrape return/refund policy content"""
-        return self._scrape_policy_page(website_url, ['return', 'refund', 'returns', 'refunds', 'shipping-returns', 'policies/refund-policy'])
+        return (self._scrape_shopify_policy(website_url, 'refund') or
+                self._scrape_policy_page(website_url, ['return', 'refund', 'returns', 'refunds', 'shipping-returns'], 'refund'))
     
-    def _scrape_policy_page(self, website_url: str, possible_paths: List[str]) -> str:
+    def _scrape_shopify_policy(self, website_url: str, category: str) -> str:
+        """
+        Scrape a policy from its canonical Shopify /policies/* endpoint.
+        One request, with the body read straight from the policy container.
+        """
+        host = store_host(website_url)
+        path = SHOPIFY_POLICY_PATHS[category]
+        if self.path_memory is not None and not self.path_memory.candidate_paths(host, [path]):
+            return ""
+        return self._probe_round(website_url, host, [path], self._parse_policy_body, category) or ""
+    
+    def _scrape_policy_page(self, website_url: str, possible_paths: List[str], category: str = 'policy') -> str:
         """Generic method to scrape policy pages"""
-        for path in possible_paths:
-            try:
-                url = urljoin(website_url, f'/{path}')
-                response = self.session.get(url, timeout=self.timeout)
-                
-                if response.status_code == 200:
-                    # Use trafilatura to extract clean text
-                    text_content = trafilatura.extract(response.content)
-                    if text_content and len(text_content.strip()) > 100:
-                        logger.info(f"Found policy content at: {url}")
-                        return text_content.strip()
-                        
-            except Exception as e:
-                logger.debug(f"Could not access {url}: {str(e)}")
-                continue
-        
-        return ""
+        return self._probe_paths(website_url, possible_paths, self._parse_text_page, category) or ""
     
     def _scrape_faqs(self, website_url: str) -> List[Dict[str, str]]:
         """Scrape FAQ content"""
         faq_paths = ['faq', 'faqs', 'help', 'support', 'pages/faq']
+        return self._probe_paths(website_url, faq_paths, self._parse_faqs, 'faq') or []
+    
+    def _probe_paths(self, website_url: str, paths: List[str],
+                     parse: Callable[[bytes], Any], category: str) -> Any:
+        """
+        Fetch candidate paths in order and return the first parsed result.
+        The parser returns None to reject a page and move on to the next path.
+        In race mode all candidates are requested at once, but results are
+        still accepted in list order and the losing requests are dropped.
+        """
+        host = store_host(website_url)
         
-        for path in faq_paths:
-            try:
-                url = urljoin(website_url, f'/{path}')
-                response = self.session.get(url, timeout=self.timeout)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    faqs = []
+        for round_paths in self._candidate_rounds(host, paths, category):
+            result = self._probe_round(website_url, host, round_paths, parse, category)
+            if result is not None:
+                return result
+        
+        return None
+    
+    def _probe_round(self, website_url: str, host: str, paths: List[str],
+                     parse: Callable[[bytes], Any], category: str) -> Any:
+        """Probe one round of candidate paths, racing them if enabled"""
+        urls = [urljoin(website_url, f'/{path}') for path in paths]
+        
+        fetches = None
+        if self.race_paths and len(urls) > 1:
+            executor = self._get_probe_executor()
+            fetches = [self._submit(executor, self.session.get, url, timeout=self.timeout) for url in urls]
+        
+        try:
+            for index, url in enumerate(urls):
+                try:
+                    if fetches:
+                        response = fetches[index].result()
+                    else:
+                        response = self.session.get(url, timeout=self.timeout)
                     
-                    # Look for FAQ patterns
-                    faq_sections = soup.find_all(['div', 'section'], class_=re.compile(r'faq|question|accordion', re.I))
+                    result = None
+                    if response.status_code == 200:
+                        result = parse(response.content)
+                    self._record_probe(host, category, paths[index], response.status_code, result)
                     
-                    for section in faq_sections:
-                        questions = section.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'dt'])
-                        for q in questions:
-                            question_text = q.get_text().strip()
-                            if question_text and '?' in question_text:
-                                # Look for answer in next sibling or parent
-                                answer_elem = q.find_next_sibling(['p', 'div', 'dd'])
-                                answer_text = answer_elem.get_text().strip() if answer_elem else ""
-                                
-                                if answer_text:
-                                    faqs.append({
-                                        'question': question_text,
-                                        'answer': answer_text
-                                    })
+                    if result is not None:
+                        logger.info(f"Found {category} content at: {url}")
+                        record_winning_path(paths[index])
+                        return result
+                            
+                except Exception as e:
+                    # Also an ExtractionError: the page was served but its text
+                    # could not be extracted, so it is not recorded as thin
+                    logger.debug(f"Could not access {category} page at {url}: {str(e)}")
+                    continue
+            
+            return None
+        finally:
+            if fetches:
+                # Lower-priority candidates that have not started are cancelled,
+                # the ones already in flight are simply ignored
+                for fetch in fetches:
+                    fetch.cancel()
+    
+    def _candidate_rounds(self, host: str, paths: List[str], category: str) -> List[List[str]]:
+        """
+        Candidate paths worth requesting for this host, split into rounds in
+        priority order. The path learned from an earlier scrape and then the
+        exact URLs found in the sitemap are tried before the guessed paths, so
+        known stores cost a single request even in race mode.
+        """
+        discovered = self._discovered_paths(host, category)
+        if discovered:
+            paths = discovered + [path for path in paths if path not in discovered]
+        
+        learned = None
+        if self.path_memory is not None:
+            paths = self.path_memory.candidate_paths(host, paths, category)
+            learned = self.path_memory.learned_path(host, category)
+        
+        rounds = []
+        if learned and paths and paths[0] == learned:
+            rounds.append([learned])
+        rest = [path for path in paths if path != learned]
+        found = [path for path in rest if path in discovered]
+        guessed = [path for path in rest if path not in discovered]
+        rounds.extend(round_paths for round_paths in (found, guessed) if round_paths)
+        return rounds
+    
+    def _discovered_paths(self, host: str, category: str) -> List[str]:
+        """Sitemap pages classified under this category, if discovery ran"""
+        if self.sitemap_cache is None:
+            return []
+        discovered = self.sitemap_cache.get(host)
+        return list(discovered.get(category, [])) if discovered else []
+    
+    def _discover_pages(self, website_url: str) -> Dict[str, List[str]]:
+        """
+        Stream /sitemap.xml and its page sitemaps once per host and classify
+        their URLs into privacy, refund, faq, about and contact candidates
+        """
+        if self.sitemap_cache is None:
+            return {}
+        
+        host = store_host(website_url)
+        cached = self.sitemap_cache.get(host)
+        if cached is not None:
+            return cached
+        
+        candidates = PageCandidates(self.sitemap_cache.max_urls)
+        try:
+            self._stream_sitemap(urljoin(website_url, '/sitemap.xml'), candidates)
+            for child in candidates.child_sitemaps[:self.sitemap_cache.max_child_sitemaps]:
+                if candidates.exhausted:
+                    break
+                self._stream_sitemap(child, candidates)
+        except Exception as e:
+            # Network failures are not cached so the next scrape retries
+            logger.debug(f"Sitemap discovery failed for {host}: {str(e)}")
+            return candidates.result()
+        
+        discovered = candidates.result()
+        self.sitemap_cache.set(host, discovered)
+        logger.info(f"Discovered {sum(len(p) for p in discovered.values())} candidate pages in sitemap for {host}")
+        return discovered
+    
+    def _stream_sitemap(self, url: str, candidates: PageCandidates) -> None:
+        """Feed one sitemap into candidates chunk by chunk"""
+        parser = SitemapParser()
+        size = 0
+        with self.session.get(url, stream=True, timeout=self.timeout) as response:
+            try:
+                if response.status_code != 200:
+                    return
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    size += len(chunk)
+                    for kind, loc in parser.feed(chunk):
+                        candidates.add(kind, loc)
+                    if candidates.exhausted:
+                        return
+            finally:
+                record_request(size)
+        for kind, loc in parser.close():
+            candidates.add(kind, loc)
+    
+    def _record_probe(self, host: str, category: str, path: str, status: int, result: Any) -> None:
+        """Remember missing or thin candidates and the path that worked"""
+        if self.path_memory is None:
+            return
+        if result is not None:
+            self.path_memory.mark_alive(host, path, category)
+        elif status in (200, 404, 410):
+            self.path_memory.mark_dead(host, path)
+    
+    def _extract_text(self, content: bytes) -> Optional[str]:
+        """
+        Extract the main text content of an HTML page. With an extraction
+        pool, raises ExtractionError when the pool could not extract it.
+        """
+        if self.extraction_pool is not None:
+            return self.extraction_pool.extract(content)
+        return trafilatura.extract(content)
+    
+    def _extract_page_text(self, content: bytes) -> Optional[str]:
+        """Main text of a policy, about or contact page, from its template container or trafilatura"""
+        return extract_page_text(content, self._extract_text)
+    
+    def _parse_policy_body(self, content: bytes) -> Optional[str]:
+        """Parse a canonical Shopify policy page, rejecting empty policies"""
+        text_content = extract_policy_body(content)
+        if text_content and len(text_content) > MIN_PAGE_TEXT_LENGTH:
+            return text_content
+        return None
+    
+    def _parse_text_page(self, content: bytes) -> Optional[str]:
+        """Parse a policy or about page, rejecting pages with too little text"""
+        text_content = self._extract_page_text(content)
+        if text_content and len(text_content.strip()) > MIN_PAGE_TEXT_LENGTH:
+            return text_content.strip()
+        return None
+    
+    def _parse_faqs(self, content: bytes) -> Optional[List[Dict[str, str]]]:
+        """Parse question/answer pairs from an FAQ page"""
+        if self.parser_backend == 'lxml.html':
+            return self._parse_faqs_xpath(content)
+        
+        soup = make_soup(content, self.parser_backend)
+        faqs = []
+        
+        # Look for FAQ patterns
+        faq_sections = soup.find_all(['div', 'section'], class_=re.compile(r'faq|question|accordion', re.I))
+        
+        for section in faq_sections:
+            questions = section.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'dt'])
+            for q in questions:
+                question_text = q.get_text().strip()
+                if question_text and '?' in question_text:
+                    # Look for answer in next sibling or parent
+                    answer_elem = q.find_next_sibling(['p', 'div', 'dd'])
+                    answer_text = answer_elem.get_text().strip() if answer_elem else ""
                     
-                    if faqs:
-                        logger.info(f"Found {len(faqs)} FAQs at: {url}")
-                        return faqs
-                        
-            except Exception as e:
-                logger.debug(f"Could not access FAQ at {url}: {str(e)}")
-                continue
+                    if answer_text:
+                        faqs.append({
+                            'question': question_text,
+                            'answer': answer_text
+                        })
         
-        return []
+        return faqs or None
     
-    def _extract_social_handles(self, soup: BeautifulSoup) -> Dict[str, str]:
-        """Extract social media handles and links"""
-        social_handles = {}
-        
-        social_patterns = {
-            'instagram': [r'instagram\.com/([^/\s"\']+)', r'@([a-zA-Z0-9_.]+)'],
-            'facebook': [r'facebook\.com/([^/\s"\']+)'],
-            'twitter': [r'twitter\.com/([^/\s"\']+)', r'x\.com/([^/\s"\']+)'],
-            'tiktok': [r'tiktok\.com/@([^/\s"\']+)'],
-            'youtube': [r'youtube\.com/([^/\s"\']+)'],
-            'linkedin': [r'linkedin\.com/([^/\s"\']+)']
-        }
+    def _parse_faqs_xpath(self, content: bytes) -> Optional[List[Dict[str, str]]]:
+        """_parse_faqs for the lxml.html backend, using XPath instead of find_all"""
+        document = parse_document(content)
+        if document is None:
+            return None
+        faqs = []
         
-        # Get all links
-        links = soup.find_all('a', href=True)
-        page_text = soup.get_text()
-        
-        for platform, patterns in social_patterns.items():
-            for pattern in patterns:
-                # Search in links
-                for link in links:
-                    href = link.get('href', '')
-                    match = re.search(pattern, href, re.IGNORECASE)
-                    if match:
-                        social_handles[platform] = {
-                            'handle': match.group(1),
-                            'url': href
-                        }
-                        break
-                
-                # Search in page text for handles
-                if platform not in social_handles:
-                    match = re.search(pattern, page_text, re.IGNORECASE)
-                    if match:
-                        social_handles[platform] = {
-                            'handle': match.group(1),
-                            'url': f"https://{platform}.com/{match.group(1)}"
-                        }
-        
-        return social_handles
-    
-    def _extract_contact_details(self, soup: BeautifulSoup, website_url: str) -> Dict[str, Any]:
+        for section in document.xpath(FAQ_SECTIONS_XPATH):
+            for q in section.xpath(FAQ_QUESTIONS_XPATH):
+                question_text = element_text(q).strip()
+                if question_text and '?' in question_text:
+                    # First following p, div or dd sibling holds the answer
+                    answer_elem = next(q.itersiblings('p', 'div', 'dd'), None)
+                    answer_text = element_text(answer_elem).strip() if answer_elem is not None else ""
+                    
+                    if answer_text:
+                        faqs.append({
+                            'question': question_text,
+                            'answer': answer_text
+                        })
+        
+        return faqs or None
+    
+    def _extract_social_handles(self, page: HomepageIndex) -> Dict[str, str]:
+        """Extract social media handles and links"""
+        return extract_social_handles((link.href for link in page.anchors), page.text)
+    
+    def _extract_contact_details(self, page: HomepageIndex, website_url: str) -> Dict[str, Any]:
         """Extract contact information"""
+        contact_details = self._extract_homepage_contact_details(page)
+        
+        # Try to scrape contact page
+        contact_page_info = self._scrape_contact_page(website_url)
+        if contact_page_info:
+            contact_details.update(contact_page_info)
+        
+        return contact_details
+    
+    def _extract_homepage_contact_details(self, page: HomepageIndex) -> Dict[str, Any]:
+        """Extract emails, phones and address from the homepage"""
         contact_details = {}
         
         # Email patterns
@@ -334,7 +946,7 @@ class ShopifyStoreScraper:
         # Phone patterns (various formats)
         phone_pattern = r'(\+?1?[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
         
-        page_text = soup.get_text()
+        page_text = page.text
         
         # Extract emails
         emails = re.findall(email_pattern, page_text)
@@ -353,130 +965,74 @@ class ShopifyStoreScraper:
         # Look for address information
         address_keywords = ['address', 'location', 'office', 'store location']
         for keyword in address_keywords:
-            address_elem = soup.find(text=re.compile(keyword, re.I))
-            if address_elem:
-                parent = address_elem.parent
-                if parent:
-                    address_text = parent.get_text().strip()
-                    if len(address_text) > 20:  # Likely contains address info
-                        contact_details['address'] = address_text
-                        break
-        
-        # Try to scrape contact page
-        contact_page_info = self._scrape_contact_page(website_url)
-        if contact_page_info:
-            contact_details.update(contact_page_info)
+            address_text = page.string_context(re.compile(keyword, re.I))
+            if address_text:
+                address_text = address_text.strip()
+                if len(address_text) > 20:  # Likely contains address info
+                    contact_details['address'] = address_text
+                    break
         
         return contact_details
     
     def _scrape_contact_page(self, website_url: str) -> Dict[str, Any]:
         """Scrape contact page for additional contact information"""
         contact_paths = ['contact', 'contact-us', 'pages/contact', 'pages/contact-us']
+        return self._probe_paths(website_url, contact_paths, self._parse_contact_page, 'contact') or {}
+    
+    def _parse_contact_page(self, content: bytes) -> Optional[Dict[str, Any]]:
+        """Parse emails and phone numbers from a contact page"""
+        text_content = self._extract_page_text(content)
+        if not text_content:
+            return None
         
-        for path in contact_paths:
-            try:
-                url = urljoin(website_url, f'/{path}')
-                response = self.session.get(url, timeout=self.timeout)
-                
-                if response.status_code == 200:
-                    text_content = trafilatura.extract(response.content)
-                    if text_content:
-                        contact_info = {}
-                        
-                        # Extract emails from contact page
-                        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-                        emails = re.findall(email_pattern, text_content)
-                        if emails:
-                            contact_info['contact_page_emails'] = list(set(emails))
-                        
-                        # Extract phone numbers
-                        phone_pattern = r'(\+?1?[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
-                        phones = re.findall(phone_pattern, text_content)
-                        if phones:
-                            contact_info['contact_page_phones'] = list(set(phones))
-                        
-                        return contact_info
-                        
-            except Exception as e:
-                logger.debug(f"Could not access contact page at {url}: {str(e)}")
-                continue
+        contact_info = {}
         
-        return {}
+        # Extract emails from contact page
+        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+        emails = re.findall(email_pattern, text_content)
+        if emails:
+            contact_info['contact_page_emails'] = list(set(emails))
+        
+        # Extract phone numbers
+        phone_pattern = r'(\+?1?[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
+        phones = re.findall(phone_pattern, text_content)
+        if phones:
+            contact_info['contact_page_phones'] = list(set(phones))
+        
+        return contact_info
     
     def _scrape_brand_context(self, website_url: str) -> str:
         """Scrape brand context from About page"""
         about_paths = ['about', 'about-us', 'pages/about', 'pages/about-us', 'our-story', 'pages/our-story']
-        
-        for path in about_paths:
-            try:
-                url = urljoin(website_url, f'/{path}')
-                response = self.session.get(url, timeout=self.timeout)
-                
-                if response.status_code == 200:
-                    text_content = trafilatura.extract(response.content)
-                    if text_content and len(text_content.strip()) > 100:
-                        logger.info(f"Found brand context at: {url}")
-                        return text_content.strip()
-                        
-            except Exception as e:
-                logger.debug(f"Could not access about page at {url}: {str(e)}")
-                continue
-        
-        return ""
+        return self._probe_paths(website_url, about_paths, self._parse_text_page, 'about') or ""
     
-    def _extract_important_links(self, soup: BeautifulSoup, website_url: str) -> List[Dict[str, str]]:
+    def _extract_important_links(self, page: HomepageIndex, website_url: str) -> List[Dict[str, str]]:
         """Extract important links like order tracking, blogs, etc."""
-        important_links = []
-        
-        # Define important link patterns
-        important_patterns = {
-            'order_tracking': ['track', 'tracking', 'order-status', 'track-order'],
-            'blog': ['blog', 'news', 'articles'],
-            'support': ['support', 'help', 'customer-service'],
-            'shipping': ['shipping', 'delivery'],
-            'size_guide': ['size-guide', 'sizing', 'size-chart'],
-            'gift_cards': ['gift-card', 'gift-cards'],
-            'wholesale': ['wholesale', 'trade', 'bulk']
-        }
+        index = self.link_index
         
-        # Find all navigation links
-        nav_links = []
+        # Each category takes its first matching link, preferring navigation
+        # menus (nav, header, footer) over the rest of the page. Every
+        # distinct link is classified once against all categories.
+        candidates = {}
+        for link in page.nav_anchors() + [link for link in page.anchors if not link.in_nav]:
+            candidates.setdefault((link.href, link.text.strip()), None)
+        candidates = list(candidates)
+        first_links = index.first_matches([f"{href.lower()}\0{title.lower()}" for href, title in candidates])
         
-        # Look in navigation menus
-        nav_elements = soup.find_all(['nav', 'header', 'footer'])
-        for nav in nav_elements:
-            links = nav.find_all('a', href=True)
-            nav_links.extend(links)
-        
-        # Also check general page links
-        all_links = soup.find_all('a', href=True)
-        nav_links.extend(all_links)
-        
-        for category, keywords in important_patterns.items():
-            for link in nav_links:
-                href = link.get('href', '').lower()
-                text = link.get_text().strip().lower()
-                
-                # Check if any keyword matches the link
-                for keyword in keywords:
-                    if keyword in href or keyword in text:
-                        full_url = urljoin(website_url, link.get('href'))
-                        important_links.append({
-                            'category': category,
-                            'title': link.get_text().strip(),
-                            'url': full_url
-                        })
-                        break
-                
-                if any(keyword in href or keyword in text for keyword in keywords):
-                    break
-        
-        # Remove duplicates
+        # In category order, without duplicate URLs
         seen_urls = set()
         unique_links = []
-        for link in important_links:
-            if link['url'] not in seen_urls:
-                seen_urls.add(link['url'])
-                unique_links.append(link)
+        for rank, category in enumerate(index.categories):
+            if rank not in first_links:
+                continue
+            href, title = candidates[first_links[rank]]
+            full_url = urljoin(website_url, href)
+            if full_url not in seen_urls:
+                seen_urls.add(full_url)
+                unique_links.append({
+                    'category': category,
+                    'title': title,
+                    'url': full_url
+                })
         
         return unique_links
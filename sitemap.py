@@ -0,0 +1,152 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SITEMAP_TTL = 6 * 60 * 60
+DEFAULT_MAX_HOSTS = 10000
+DEFAULT_MAX_CHILD_SITEMAPS = 5
+DEFAULT_MAX_URLS = 50000
+
+# Keywords matched against the last path segment of a sitemap URL
+CATEGORY_KEYWORDS = {
+    'privacy': ('privacy',),
+    'refund': ('refund', 'return'),
+    'faq': ('faq', 'frequently-asked'),
+    'about': ('about', 'our-story', 'who-we-are'),
+    'contact': ('contact',),
+}
+
+# Shopify child sitemaps that can never hold policy, FAQ, about or contact pages
+SKIPPED_CHILD_SITEMAPS = ('sitemap_products', 'sitemap_collections', 'sitemap_blogs')
+
+
+def classify_url(loc: str) -> Optional[str]:
+    """Map a page URL to a discovery category, or None"""
+    path = urlparse(loc).path.rstrip('/')
+    handle = path.rsplit('/', 1)[-1].lower()
+    if not handle:
+        return None
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        if any(keyword in handle for keyword in keywords):
+            return category
+    return None
+
+
+def wanted_child_sitemap(loc: str) -> bool:
+    """Whether a child sitemap can contain pages worth classifying"""
+    name = urlparse(loc).path.rsplit('/', 1)[-1].lower()
+    return not name.startswith(SKIPPED_CHILD_SITEMAPS)
+
+
+class SitemapParser:
+    """
+    Incremental sitemap parser. Bytes are fed as they arrive and each
+    completed <sitemap> or <url> entry is returned as ('sitemap' | 'url', loc),
+    then dropped from the tree, so memory stays flat on large sitemaps.
+    """
+
+    def __init__(self):
+        self._parser = etree.XMLPullParser(
+            events=('end',),
+            tag=('{*}sitemap', '{*}url'),
+            resolve_entities=False,
+            no_network=True,
+            huge_tree=True
+        )
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, str]]:
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[Tuple[str, str]]:
+        try:
+            self._parser.close()
+        except etree.XMLSyntaxError as e:
+            logger.debug(f"Truncated or invalid sitemap: {str(e)}")
+        return self._drain()
+
+    def _drain(self) -> List[Tuple[str, str]]:
+        entries = []
+        for _, elem in self._parser.read_events():
+            kind = etree.QName(elem).localname
+            loc = elem.findtext('{*}loc')
+            if loc:
+                entries.append((kind, loc.strip()))
+            # Release parsed entries and their already-processed siblings
+            elem.clear()
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+        return entries
+
+
+class PageCandidates:
+    """Sitemap URLs classified into discovery categories"""
+
+    def __init__(self, max_urls: int = DEFAULT_MAX_URLS):
+        self.max_urls = max_urls
+        self.seen_urls = 0
+        self.paths: Dict[str, List[str]] = {}
+        self.child_sitemaps: List[str] = []
+
+    @property
+    def exhausted(self) -> bool:
+        return self.seen_urls >= self.max_urls
+
+    def add(self, kind: str, loc: str) -> None:
+        if kind == 'sitemap':
+            if wanted_child_sitemap(loc):
+                self.child_sitemaps.append(loc)
+            return
+
+        self.seen_urls += 1
+        category = classify_url(loc)
+        if category:
+            path = urlparse(loc).path.strip('/')
+            bucket = self.paths.setdefault(category, [])
+            if path and path not in bucket:
+                bucket.append(path)
+
+    def result(self) -> Dict[str, List[str]]:
+        # Shorter handles (e.g. pages/about before pages/about-our-factory)
+        # are the more likely canonical page
+        return {category: sorted(paths, key=len) for category, paths in self.paths.items()}
+
+
+class SitemapCache:
+    """Per-host TTL cache of discovered page candidates"""
+
+    def __init__(self, ttl: float = DEFAULT_SITEMAP_TTL, max_hosts: int = DEFAULT_MAX_HOSTS,
+                 max_child_sitemaps: int = DEFAULT_MAX_CHILD_SITEMAPS, max_urls: int = DEFAULT_MAX_URLS):
+        self.ttl = ttl
+        self.max_hosts = max_hosts
+        self.max_child_sitemaps = max_child_sitemaps
+        self.max_urls = max_urls
+        self._entries: 'OrderedDict[str, Tuple[float, Dict[str, List[str]]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> Optional[Dict[str, List[str]]]:
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is None:
+                return None
+            expires, paths = entry
+            if expires <= time.time():
+                del self._entries[host]
+                return None
+            self._entries.move_to_end(host)
+            return paths
+
+    def set(self, host: str, paths: Dict[str, List[str]]) -> None:
+        with self._lock:
+            self._entries[host] = (time.time() + self.ttl, paths)
+            self._entries.move_to_end(host)
+            while len(self._entries) > self.max_hosts:
+                self._entries.popitem(last=False)
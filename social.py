@@ -0,0 +1,112 @@
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+# Handle patterns as (platform, prefix, handle); for each platform the link
+# match of the last pattern wins, and the page text is only searched when no
+# link matched, taking the first pattern found there
+SOCIAL_PATTERNS: List[Tuple[str, str, str]] = [
+    ('instagram', r'instagram\.com/', r'[^/\s"\']+'),
+    ('instagram', r'@', r'[a-z0-9_.]+'),
+    ('facebook', r'facebook\.com/', r'[^/\s"\']+'),
+    ('twitter', r'twitter\.com/', r'[^/\s"\']+'),
+    ('twitter', r'x\.com/', r'[^/\s"\']+'),
+    ('tiktok', r'tiktok\.com/@', r'[^/\s"\']+'),
+    ('youtube', r'youtube\.com/', r'[^/\s"\']+'),
+    ('linkedin', r'linkedin\.com/', r'[^/\s"\']+'),
+]
+
+SOCIAL_PLATFORMS: Dict[str, List[int]] = {}
+for _index, (_platform, _, _) in enumerate(SOCIAL_PATTERNS):
+    SOCIAL_PLATFORMS.setdefault(_platform, []).append(_index)
+
+
+def _alternative(index: int, prefix: str, handle: str) -> str:
+    # Only the first character is consumed, so overlapping matches of other
+    # patterns (the @ inside tiktok.com/@name) are still found
+    return f'{prefix[0]}(?={prefix[1:]}(?P<h{index}>{handle}))'
+
+
+# The branches are anchored on mutually exclusive literals: no prefix is a
+# prefix of another (twitter.com/ and tiktok.com/@ share only their first
+# character), so at most one branch can match at a position and branch
+# order never hides a match. Their leading characters give a fast prefix
+# scan. It runs on case-folded text instead of using re.IGNORECASE, which
+# would disable that scan.
+SOCIAL_MATCHER = re.compile('|'.join(
+    _alternative(index, prefix, handle) for index, (_, prefix, handle) in enumerate(SOCIAL_PATTERNS)
+))
+
+
+def _fold(text: str) -> str:
+    """
+    Lowercase text the way re.IGNORECASE compares ASCII letters, keeping
+    every character at its offset so spans map back to the original
+    """
+    return text.replace('İ', 'i').lower().replace('ı', 'i').replace('ſ', 's')
+
+
+def _iter_matches(text: str) -> Iterator[Tuple[int, int, int]]:
+    """(pattern index, handle start, handle end) for every match, in order"""
+    for match in SOCIAL_MATCHER.finditer(_fold(text)):
+        group = match.lastgroup
+        start, end = match.span(group)
+        yield int(group[1:]), start, end
+
+
+def _first_link_matches(hrefs: Iterable[str]) -> Dict[int, Tuple[str, str]]:
+    """(handle, href) of the first href each pattern matches, from one scan"""
+    # Handles stop at whitespace, so no match spans two hrefs
+    unique = list(dict.fromkeys(hrefs))
+    joined = '\n'.join(unique)
+    offsets = []
+    offset = 0
+    for href in unique:
+        offsets.append(offset)
+        offset += len(href) + 1
+
+    found: Dict[int, Tuple[str, str]] = {}
+    for index, start, end in _iter_matches(joined):
+        if index not in found:
+            found[index] = (joined[start:end], unique[bisect_right(offsets, start) - 1])
+            if len(found) == len(SOCIAL_PATTERNS):
+                break
+    return found
+
+
+def _first_text_matches(text: str, wanted: Set[int]) -> Dict[int, str]:
+    """Handle of the first match of each wanted pattern in text"""
+    found: Dict[int, str] = {}
+    for index, start, end in _iter_matches(text):
+        if index in wanted and index not in found:
+            found[index] = text[start:end]
+            if len(found) == len(wanted):
+                break
+    return found
+
+
+def extract_social_handles(hrefs: Iterable[str], text: str) -> Dict[str, Dict[str, str]]:
+    """
+    Social handles from the homepage anchors and text: one scan over all
+    hrefs classifies them, and one scan of the text covers the platforms
+    no link matched
+    """
+    link_matches = _first_link_matches(hrefs)
+    unmatched = [platform for platform, indexes in SOCIAL_PLATFORMS.items()
+                 if not any(index in link_matches for index in indexes)]
+    wanted = {index for platform in unmatched for index in SOCIAL_PLATFORMS[platform]}
+    text_matches = _first_text_matches(text, wanted) if wanted else {}
+
+    social_handles = {}
+    for platform, indexes in SOCIAL_PLATFORMS.items():
+        linked = [index for index in indexes if index in link_matches]
+        if linked:
+            handle, href = link_matches[linked[-1]]
+            social_handles[platform] = {'handle': handle, 'url': href}
+            continue
+        for index in indexes:
+            if index in text_matches:
+                handle = text_matches[index]
+                social_handles[platform] = {'handle': handle, 'url': f"https://{platform}.com/{handle}"}
+                break
+    return social_handles
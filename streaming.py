@@ -0,0 +1,93 @@
+import json
+import queue
+import logging
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from result_cache import CachedResult
+from scraper import SectionCallback
+
+logger = logging.getLogger(__name__)
+
+# Seconds without a section before an SSE keep-alive comment is sent
+HEARTBEAT_INTERVAL = 15
+
+SSE_MIMETYPE = 'text/event-stream'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# ('section', name, value), ('done', CachedResult, None) or ('error', exception, None)
+Item = Tuple[str, Any, Any]
+
+
+class SectionStream:
+    """
+    Hands the sections of one scrape from the threads producing them to a
+    streaming response. run() performs the scrape and is meant for a worker
+    thread; the response thread reads items with first() and events().
+    """
+
+    def __init__(self):
+        self._queue: 'queue.Queue[Item]' = queue.Queue()
+
+    def add_section(self, name: str, value: Any) -> None:
+        self._queue.put(('section', name, value))
+
+    def run(self, compute: Callable[[SectionCallback], CachedResult]) -> None:
+        """Run compute(on_section) and queue its outcome after its sections"""
+        try:
+            self._queue.put(('done', compute(self.add_section), None))
+        except Exception as e:
+            logger.error(f"Streamed scrape failed: {str(e)}")
+            self._queue.put(('error', e, None))
+
+    def first(self) -> Item:
+        """
+        Block until the scrape either reports a section or finishes, so a
+        store that cannot be scraped is still answered with a plain error
+        """
+        return self._queue.get()
+
+    def events(self, first: Item, heartbeat: Optional[float] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield (event, payload) pairs, starting with the item from first():
+        one 'section' per insights section, then 'done', or 'error'. With a
+        heartbeat interval, ('heartbeat', {}) is yielded while nothing arrives.
+        """
+        sent = set()
+        item: Optional[Item] = first
+        while True:
+            if item is None:
+                yield 'heartbeat', {}
+            elif item[0] == 'section':
+                _, name, value = item
+                sent.add(name)
+                yield 'section', {'section': name, 'data': value}
+            elif item[0] == 'done':
+                cached = item[1]
+                if cached.value is None:
+                    yield 'error', {'status': 401}
+                    return
+                # Cached and coalesced results arrive whole rather than per section
+                for name, value in cached.value.items():
+                    if name not in sent:
+                        yield 'section', {'section': name, 'data': value}
+                yield 'done', {'cache': cached.status}
+                return
+            else:
+                yield 'error', {'status': 500}
+                return
+
+            try:
+                item = self._queue.get(timeout=heartbeat)
+            except queue.Empty:
+                item = None
+
+
+def format_sse(event: str, payload: Dict[str, Any]) -> str:
+    if event == 'heartbeat':
+        return ': keep-alive\n\n'
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def format_ndjson(event: str, payload: Dict[str, Any]) -> str:
+    if event == 'heartbeat':
+        return ''
+    return json.dumps({'event': event, **payload}) + '\n'